@@ -11,16 +11,66 @@ class Settings(BaseSettings):
     neo4j_uri: str = os.getenv("NEO4J_URI", "bolt://localhost:7687")
     neo4j_user: str = os.getenv("NEO4J_USER", "neo4j")
     neo4j_password: str = os.getenv("NEO4J_PASSWORD", "password")
+    neo4j_required: bool = os.getenv("NEO4J_REQUIRED", "False").lower() == "true"
+    neo4j_connect_timeout: float = float(os.getenv("NEO4J_CONNECT_TIMEOUT", "5"))
+    neo4j_retry_interval: float = float(os.getenv("NEO4J_RETRY_INTERVAL", "30"))
     
     # External APIs
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
     ocr_api_key: str = os.getenv("OCR_API_KEY", "")
     ocr_api_url: str = os.getenv("OCR_API_URL", "https://api.example.com/ocr")
     
+    # LLM admission control
+    llm_initial_concurrency: int = int(os.getenv("LLM_INITIAL_CONCURRENCY", "4"))
+    llm_min_concurrency: int = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+    llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+    llm_target_latency: float = float(os.getenv("LLM_TARGET_LATENCY", "10"))
+    llm_tokens_per_minute: int = int(os.getenv("LLM_TOKENS_PER_MINUTE", "90000"))
+    llm_completion_token_estimate: int = int(os.getenv("LLM_COMPLETION_TOKEN_ESTIMATE", "500"))
+    llm_queue_timeout: float = float(os.getenv("LLM_QUEUE_TIMEOUT", "5"))
+    llm_background_queue_timeout: float = float(os.getenv("LLM_BACKGROUND_QUEUE_TIMEOUT", "60"))
+    
+    # Enhancement micro-batching
+    enhance_batch_window_ms: float = float(os.getenv("ENHANCE_BATCH_WINDOW_MS", "50"))
+    enhance_batch_max_size: int = int(os.getenv("ENHANCE_BATCH_MAX_SIZE", "20"))
+    enhance_batch_max_retries: int = int(os.getenv("ENHANCE_BATCH_MAX_RETRIES", "2"))
+    
+    # Background jobs (scan -> OCR -> concepts -> enhance -> graph)
+    jobs_db_path: str = os.getenv("JOBS_DB_PATH", "./ardent_jobs.db")
+    job_spool_dir: str = os.getenv("JOB_SPOOL_DIR", "./job_spool")
+    job_max_attempts: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    job_retry_backoff: float = float(os.getenv("JOB_RETRY_BACKOFF", "2"))
+    job_retry_max_delay: float = float(os.getenv("JOB_RETRY_MAX_DELAY", "300"))
+    job_poll_interval: float = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+    job_lease_seconds: float = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+    job_ocr_concurrency: int = int(os.getenv("JOB_OCR_CONCURRENCY", "2"))
+    job_concepts_concurrency: int = int(os.getenv("JOB_CONCEPTS_CONCURRENCY", "4"))
+    job_enhance_concurrency: int = int(os.getenv("JOB_ENHANCE_CONCURRENCY", "4"))
+    job_graph_concurrency: int = int(os.getenv("JOB_GRAPH_CONCURRENCY", "2"))
+    job_graph_max_attempts: int = int(os.getenv("JOB_GRAPH_MAX_ATTEMPTS", "20"))
+    
+    # Image URL fetching (OCR from image_url)
+    image_fetch_max_bytes: int = int(os.getenv("IMAGE_FETCH_MAX_BYTES", str(10 * 1024 * 1024)))
+    image_fetch_timeout: float = float(os.getenv("IMAGE_FETCH_TIMEOUT", "15"))
+    image_fetch_connect_timeout: float = float(os.getenv("IMAGE_FETCH_CONNECT_TIMEOUT", "5"))
+    image_cache_dir: str = os.getenv("IMAGE_CACHE_DIR", "./image_cache")
+    image_cache_max_age: float = float(os.getenv("IMAGE_CACHE_MAX_AGE", "300"))
+    image_cache_max_bytes: int = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+    
     # App
     app_env: str = os.getenv("APP_ENV", "development")
     debug: bool = os.getenv("DEBUG", "True").lower() == "true"
 
+    # Instrumentation
+    event_loop_lag_interval: float = float(os.getenv("EVENT_LOOP_LAG_INTERVAL", "0.5"))
+
+    # Profiling (disabled unless PROFILING_TOKEN is set)
+    profiling_token: str = os.getenv("PROFILING_TOKEN", "")
+    profile_sample_interval: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+    profile_max_seconds: int = int(os.getenv("PROFILE_MAX_SECONDS", "60"))
+    slow_request_threshold_ms: float = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "250"))
+    slow_request_buffer_size: int = int(os.getenv("SLOW_REQUEST_BUFFER_SIZE", "100"))
+
     class Config:
         env_file = ".env"
         case_sensitive = False
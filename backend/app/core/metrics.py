@@ -0,0 +1,200 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.profiling import record_span
+
+# HTTP requests, labelled by route template (not raw path) to keep cardinality bounded
+REQUEST_LATENCY = Histogram(
+    "ardent_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "ardent_http_requests_in_progress",
+    "HTTP requests currently being served",
+)
+
+# Outbound calls: openai, ocr_api, tesseract, neo4j
+UPSTREAM_LATENCY = Histogram(
+    "ardent_upstream_duration_seconds",
+    "Latency of outbound calls by upstream",
+    ["upstream", "outcome"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+# Per-request span kind for each upstream (see app.core.profiling)
+SPAN_KINDS = {"openai": "llm", "ocr_api": "ocr", "tesseract": "ocr", "neo4j": "graph", "image_fetch": "http"}
+
+# SQLAlchemy statements
+DB_QUERIES = Counter(
+    "ardent_db_queries_total",
+    "SQL statements executed",
+    ["operation"],
+)
+DB_QUERY_LATENCY = Histogram(
+    "ardent_db_query_duration_seconds",
+    "SQL statement latency",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+OCR_QUEUE_DEPTH = Gauge(
+    "ardent_ocr_queue_depth",
+    "OCR requests waiting or running",
+)
+
+# Outbound LLM admission control (app.services.llm_limiter)
+LLM_CONCURRENCY_LIMIT = Gauge(
+    "ardent_llm_concurrency_limit",
+    "Current adaptive concurrency limit for LLM calls",
+)
+LLM_IN_FLIGHT = Gauge(
+    "ardent_llm_in_flight",
+    "LLM calls currently admitted",
+)
+LLM_QUEUE_WAIT = Histogram(
+    "ardent_llm_queue_wait_seconds",
+    "Time LLM calls waited for admission",
+    ["lane"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+LLM_REJECTIONS = Counter(
+    "ardent_llm_rejections_total",
+    "LLM calls rejected because they could not be admitted in time",
+    ["lane"],
+)
+
+# Cross-request enhancement batching (app.services.enhancement_batcher)
+ENHANCE_BATCH_SIZE = Histogram(
+    "ardent_enhance_batch_size",
+    "Distinct concepts per batched enhancement prompt",
+    buckets=(1, 2, 4, 8, 12, 16, 24, 32, 48, 64),
+)
+ENHANCE_CONCEPTS = Counter(
+    "ardent_enhance_concepts_total",
+    "Concepts processed by the enhancement batcher (rate of ok = concepts/s)",
+    ["result"],
+)
+
+JOB_QUEUE_DEPTH = Gauge(
+    "ardent_job_queue_depth",
+    "Scan job tasks queued or running, by stage",
+    ["stage"],
+)
+
+CACHE_REQUESTS = Counter(
+    "ardent_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"],
+)
+
+EVENT_LOOP_LAG = Gauge(
+    "ardent_event_loop_lag_seconds",
+    "Most recent event loop scheduling delay",
+)
+EVENT_LOOP_LAG_HISTOGRAM = Histogram(
+    "ardent_event_loop_lag_duration_seconds",
+    "Distribution of event loop scheduling delay",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+
+@contextmanager
+def track_upstream(upstream: str):
+    """Time an outbound call and record its outcome."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        elapsed = time.perf_counter() - start
+        UPSTREAM_LATENCY.labels(upstream, outcome).observe(elapsed)
+        record_span(SPAN_KINDS.get(upstream, upstream), elapsed)
+
+
+@contextmanager
+def track_ocr_queue():
+    """Count an OCR request as queued/in flight for its duration."""
+    OCR_QUEUE_DEPTH.inc()
+    try:
+        yield
+    finally:
+        OCR_QUEUE_DEPTH.dec()
+
+
+def record_cache(cache: str, hit: bool):
+    """Record a cache lookup; the hit ratio is hit / (hit + miss)."""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def instrument_engine(engine):
+    """Count and time every SQL statement run through the engine."""
+
+    # The start time lives on the per-statement execution context rather than the
+    # pooled connection, so a statement that raises leaves nothing behind
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_start
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        DB_QUERIES.labels(operation).inc()
+        DB_QUERY_LATENCY.labels(operation).observe(elapsed)
+        record_span("db", elapsed)
+
+
+async def monitor_event_loop_lag(interval: float = None):
+    """Measure how late the loop wakes us up; sustained lag means something is blocking it."""
+    interval = interval or settings.event_loop_lag_interval
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        EVENT_LOOP_LAG.set(lag)
+        EVENT_LOOP_LAG_HISTOGRAM.observe(lag)
+
+
+def render_metrics() -> tuple:
+    """Return the Prometheus exposition payload and its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+            # FastAPI stores the matched APIRoute in the scope once routing is done
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            REQUEST_LATENCY.labels(scope["method"], route_path, str(status_code)).observe(
+                time.perf_counter() - start
+            )
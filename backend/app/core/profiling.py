@@ -0,0 +1,242 @@
+import asyncio
+import hmac
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, deque
+from contextvars import ContextVar
+from typing import Optional
+from app.core.config import settings
+
+current_trace: ContextVar = ContextVar("current_trace", default=None)
+
+# Slow requests above the threshold, newest last; oldest fall off the end
+slow_requests: deque = deque(maxlen=settings.slow_request_buffer_size)
+
+# Per-request profile artifacts, fetched by id from the admin API
+_request_profiles: OrderedDict = OrderedDict()
+_MAX_REQUEST_PROFILES = 20
+
+
+class RequestTrace:
+    """Time spent per span kind (db, llm, ocr, graph) during one request."""
+
+    __slots__ = ("method", "path", "route", "status", "started_at", "duration", "spans", "span_counts")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.route = None
+        self.status = None
+        self.started_at = time.time()
+        self.duration = 0.0
+        self.spans = {}
+        self.span_counts = {}
+
+    def add_span(self, kind: str, elapsed: float):
+        self.spans[kind] = self.spans.get(kind, 0.0) + elapsed
+        self.span_counts[kind] = self.span_counts.get(kind, 0) + 1
+
+    def to_dict(self) -> dict:
+        return {
+            "method": self.method,
+            "route": self.route,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "spans_ms": {kind: round(t * 1000, 3) for kind, t in self.spans.items()},
+            "span_counts": dict(self.span_counts),
+        }
+
+
+def record_span(kind: str, elapsed: float):
+    """Attribute elapsed time to the request currently being served, if any."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add_span(kind, elapsed)
+
+
+def get_slow_requests(limit: int = 20) -> list:
+    """Slowest requests from the ring buffer, slowest first."""
+    traces = sorted(slow_requests, key=lambda t: t.duration, reverse=True)
+    return [t.to_dict() for t in traces[:limit]]
+
+
+def get_request_profile(profile_id: str) -> Optional[dict]:
+    return _request_profiles.get(profile_id)
+
+
+def _store_request_profile(profile_id: str, artifact: dict):
+    _request_profiles[profile_id] = artifact
+    while len(_request_profiles) > _MAX_REQUEST_PROFILES:
+        _request_profiles.popitem(last=False)
+
+
+def is_valid_profiling_token(token: Optional[str]) -> bool:
+    """Profiling is disabled unless PROFILING_TOKEN is set."""
+    if not settings.profiling_token or not token:
+        return False
+    return hmac.compare_digest(token.encode(), settings.profiling_token.encode())
+
+
+SAMPLER_THREAD_NAME = "stack-sampler"
+
+# Admin calls carry the token too; they are never profiled per request
+_UNPROFILED_PREFIX = "/api/admin"
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Sampling profiler: a background thread snapshots every thread's stack.
+
+    Stacks are aggregated as they are taken, so memory stays proportional to the
+    number of distinct stacks rather than the duration.
+    """
+
+    def __init__(self, interval: float = None):
+        self.interval = interval or settings.profile_sample_interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=SAMPLER_THREAD_NAME, daemon=True)
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling and wait for the thread (blocking; see stop_async)."""
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        return self
+
+    async def stop_async(self):
+        """stop() without blocking the event loop on the thread join."""
+        return await asyncio.to_thread(self.stop)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                # Skip this and any other concurrently running sampler
+                if thread_id == own_id or names.get(thread_id) == SAMPLER_THREAD_NAME:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                stack.reverse()
+                self.stacks[tuple(stack)] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Brendan Gregg collapsed-stack format, ready for flamegraph.pl or speedscope."""
+        return "\n".join(
+            f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()
+        )
+
+    def speedscope(self, name: str = "ardent-study") -> dict:
+        """Speedscope "sampled" profile; each distinct stack is one weighted sample."""
+        frame_index = {}
+        frames = []
+        samples = []
+        weights = []
+        for stack, count in self.stacks.items():
+            indices = []
+            for label in stack:
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    frames.append({"name": label})
+                indices.append(frame_index[label])
+            samples.append(indices)
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": self.duration,
+                "samples": samples,
+                "weights": weights,
+            }],
+            "name": name,
+            "exporter": "ardent-study",
+        }
+
+    def render(self, fmt: str, name: str = "ardent-study"):
+        return self.speedscope(name) if fmt == "speedscope" else self.collapsed()
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware that traces every request and profiles on demand.
+
+    Every request gets a RequestTrace collecting db/llm/ocr/graph span time; slow
+    ones land in the ring buffer. A request that opts in with `X-Profile: 1` and
+    carries a valid X-Profile-Token is also sampled; the artifact id is returned
+    in X-Profile-Id. Admin endpoints are never sampled.
+    The sampler sees the whole process, so concurrent requests show up too.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(scope["method"], scope["path"])
+        token = current_trace.set(trace)
+
+        headers = dict(scope["headers"])
+        sampler = None
+        profile_id = None
+        if (
+            headers.get(b"x-profile") == b"1"
+            and not scope["path"].startswith(_UNPROFILED_PREFIX)
+            and is_valid_profiling_token(headers.get(b"x-profile-token", b"").decode("latin-1"))
+        ):
+            profile_id = uuid.uuid4().hex
+            fmt = headers.get(b"x-profile-format", b"collapsed").decode("latin-1")
+            sampler = StackSampler().start()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                if profile_id:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-profile-id", profile_id.encode())
+                    ]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            trace.duration = time.perf_counter() - start
+            trace.route = getattr(scope.get("route"), "path", None)
+            current_trace.reset(token)
+            if trace.duration * 1000 >= settings.slow_request_threshold_ms:
+                slow_requests.append(trace)
+            if sampler is not None:
+                await sampler.stop_async()
+                _store_request_profile(profile_id, {
+                    "format": fmt,
+                    "trace": trace.to_dict(),
+                    "profile": sampler.render(fmt, name=f"{trace.method} {trace.path}"),
+                })
@@ -0,0 +1,47 @@
+import gzip
+from typing import Any, Callable, Iterable, Optional
+import orjson
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+
+__all__ = ["ORJSONResponse", "StreamingJSONArrayResponse", "compact_response", "iter_json_array"]
+
+
+def iter_json_array(items: Iterable, chunk_size: int = 500, encode: Optional[Callable] = None):
+    """Yield a JSON array in chunks, encoding `chunk_size` items per orjson call."""
+    yield b"["
+    first = True
+    chunk = []
+    for item in items:
+        chunk.append(encode(item) if encode else item)
+        if len(chunk) >= chunk_size:
+            yield (b"" if first else b",") + orjson.dumps(chunk)[1:-1]
+            first = False
+            chunk = []
+    if chunk:
+        yield (b"" if first else b",") + orjson.dumps(chunk)[1:-1]
+    yield b"]"
+
+
+class StreamingJSONArrayResponse(StreamingResponse):
+    """Stream a large list as a JSON array without building the whole payload in memory."""
+
+    def __init__(self, items: Iterable, chunk_size: int = 500, encode: Optional[Callable] = None, **kwargs):
+        super().__init__(iter_json_array(items, chunk_size, encode), media_type="application/json", **kwargs)
+
+
+def compact_response(content: Any, format: str = "json", accept_encoding: str = "",
+                     min_gzip_size: int = 1024) -> Response:
+    """Encode as JSON or MessagePack, gzipped when the client accepts it and the body is worth it."""
+    if format == "msgpack":
+        # Imported on first use; only snapshot clients ask for MessagePack
+        import msgpack
+        body = msgpack.packb(content, use_bin_type=True)
+        media_type = "application/msgpack"
+    else:
+        body = orjson.dumps(content)
+        media_type = "application/json"
+    headers = {"Vary": "Accept-Encoding"}
+    if "gzip" in (accept_encoding or "").lower() and len(body) >= min_gzip_size:
+        body = gzip.compress(body, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+    return Response(body, media_type=media_type, headers=headers)
@@ -1,11 +1,13 @@
-from sqlalchemy import create_engine
+from sqlalchemy import Float, create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.core.metrics import instrument_engine
 
 engine = create_engine(
     settings.database_url, 
     connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
 )
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -17,6 +19,50 @@ def get_db():
     finally:
         db.close()
 
+def dialect_insert():
+    """INSERT construct with on_conflict_do_update for the configured database."""
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
 def init_db():
     """Initialize database tables."""
     Base.metadata.create_all(bind=engine)
+    upgrade_db()
+
+def upgrade_db():
+    """Apply schema additions to tables created by earlier versions (create_all skips existing tables)."""
+    inspector = inspect(engine)
+    tables = inspector.get_table_names()
+    with engine.begin() as conn:
+        if "quizzes" in tables:
+            columns = {column["name"] for column in inspector.get_columns("quizzes")}
+            if "answer_key" not in columns:
+                conn.execute(text("ALTER TABLE quizzes ADD COLUMN answer_key JSON"))
+        if "learning_progress" in tables:
+            indexes = {index["name"] for index in inspector.get_indexes("learning_progress")}
+            if "ix_learning_progress_user_concept" not in indexes:
+                # Older versions could store duplicates; keep the most recently reviewed
+                # row per (user, concept), then the one with the most reviews
+                conn.execute(text(
+                    "DELETE FROM learning_progress WHERE id IN ("
+                    "SELECT id FROM (SELECT id, ROW_NUMBER() OVER ("
+                    "PARTITION BY user_id, concept_id "
+                    "ORDER BY CASE WHEN last_reviewed IS NULL THEN 1 ELSE 0 END, "
+                    "last_reviewed DESC, review_count DESC, id) AS row_num "
+                    "FROM learning_progress) ranked WHERE row_num > 1)"
+                ))
+                conn.execute(text(
+                    "CREATE UNIQUE INDEX ix_learning_progress_user_concept "
+                    "ON learning_progress (user_id, concept_id)"
+                ))
+            mastery = next(column for column in inspector.get_columns("learning_progress")
+                           if column["name"] == "mastery_level")
+            if engine.dialect.name == "postgresql" and not isinstance(mastery["type"], Float):
+                # Mastery moves in 0.2 steps; an integer column rounds every increment away.
+                # SQLite columns keep whatever type is stored and need no change
+                conn.execute(text(
+                    "ALTER TABLE learning_progress ALTER COLUMN mastery_level TYPE DOUBLE PRECISION"
+                ))
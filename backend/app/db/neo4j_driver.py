@@ -1,24 +1,123 @@
-from neo4j import GraphDatabase
+import asyncio
+import threading
+from typing import Dict, Iterable, List, Optional
 from app.core.config import settings
+from app.core.metrics import track_upstream
+
+# Every write bumps a single graph-wide counter and stamps what it touched with the
+# new value, so snapshot clients can ask for "everything after version N". The
+# counter node is locked by the SET, so versions follow commit order.
+NEXT_VERSION = """
+MERGE (v:GraphVersion {id: 'graph'})
+SET v.value = coalesce(v.value, 0) + 1
+WITH v.value AS version
+"""
+
+SCHEMA = [
+    "CREATE CONSTRAINT graph_version_id IF NOT EXISTS FOR (v:GraphVersion) REQUIRE v.id IS UNIQUE",
+    "CREATE INDEX concept_id IF NOT EXISTS FOR (c:Concept) ON (c.id)",
+]
 
 class Neo4jDriver:
+    """Neo4j access; the driver is created lazily by connect(), never at import."""
+
     def __init__(self):
-        self.driver = GraphDatabase.driver(
-            settings.neo4j_uri,
-            auth=(settings.neo4j_user, settings.neo4j_password),
-            encrypted=False
-        )
+        self.driver = None
+        self.status = "pending"
+        self._closed = False
+        self._lock = threading.Lock()
+    
+    @property
+    def is_ready(self) -> bool:
+        return self.driver is not None and self.status == "ready"
+    
+    def connect(self) -> bool:
+        """Create the driver and verify the server is reachable (blocking)."""
+        if self._closed:
+            return False
+        self.status = "connecting"
+        driver = None
+        try:
+            from neo4j import GraphDatabase
+            
+            driver = GraphDatabase.driver(
+                settings.neo4j_uri,
+                auth=(settings.neo4j_user, settings.neo4j_password),
+                encrypted=False,
+                connection_timeout=settings.neo4j_connect_timeout
+            )
+            driver.verify_connectivity()
+            with driver.session() as session:
+                for statement in SCHEMA:
+                    session.run(statement)
+        except Exception as e:
+            if driver:
+                driver.close()
+            self.status = "unavailable"
+            print(f"Warning: Could not connect to Neo4j: {e}")
+            return False
+        with self._lock:
+            # close() may have run while this thread was connecting
+            if self._closed:
+                driver.close()
+                return False
+            self.driver = driver
+            self.status = "ready"
+        return True
+    
+    def check_connectivity(self) -> bool:
+        """Re-verify an existing driver and update status, so later outages show up (blocking)."""
+        driver = self.driver
+        if driver is None or self._closed:
+            return False
+        try:
+            driver.verify_connectivity()
+            healthy = True
+        except Exception as e:
+            if self.status == "ready":
+                print(f"Warning: Lost connection to Neo4j: {e}")
+            healthy = False
+        with self._lock:
+            if not self._closed:
+                self.status = "ready" if healthy else "unavailable"
+        return healthy
+    
+    async def connect_in_background(self):
+        """Connect without blocking the event loop, then keep checking the connection."""
+        while not self._closed and not await asyncio.to_thread(self.connect):
+            await asyncio.sleep(settings.neo4j_retry_interval)
+        while not self._closed:
+            await asyncio.sleep(settings.neo4j_retry_interval)
+            await asyncio.to_thread(self.check_connectivity)
     
     def close(self):
-        """Close the driver connection."""
-        self.driver.close()
+        """Close the driver connection; a connect() still in flight discards its driver."""
+        with self._lock:
+            self._closed = True
+            driver, self.driver = self.driver, None
+            self.status = "closed"
+        if driver:
+            driver.close()
     
     def create_concept(self, concept_id: str, name: str, definition: str):
         """Create a concept node in Neo4j."""
-        with self.driver.session() as session:
+        with track_upstream("neo4j"), self.driver.session() as session:
             session.run(
-                """
-                CREATE (c:Concept {id: $id, name: $name, definition: $definition})
+                NEXT_VERSION + """
+                CREATE (c:Concept {id: $id, name: $name, definition: $definition, version: version})
+                """,
+                id=concept_id,
+                name=name,
+                definition=definition
+            )
+    
+    def merge_concept(self, concept_id: str, name: str, definition: str):
+        """Create or update a concept node; safe to repeat."""
+        with track_upstream("neo4j"), self.driver.session() as session:
+            session.run(
+                NEXT_VERSION + """
+                MERGE (c:Concept {id: $id})
+                SET c.name = $name, c.definition = $definition, c.version = version
                 """,
                 id=concept_id,
                 name=name,
@@ -27,11 +126,11 @@ class Neo4jDriver:
     
     def link_concepts(self, concept1_id: str, concept2_id: str, relation_type: str = "RELATED_TO"):
         """Create a relationship between two concepts."""
-        with self.driver.session() as session:
+        with track_upstream("neo4j"), self.driver.session() as session:
             session.run(
-                f"""
+                NEXT_VERSION + f"""
                 MATCH (c1:Concept {{id: $id1}}), (c2:Concept {{id: $id2}})
-                CREATE (c1)-[:{relation_type}]->(c2)
+                CREATE (c1)-[:{relation_type} {{version: version}}]->(c2)
                 """,
                 id1=concept1_id,
                 id2=concept2_id
@@ -39,7 +138,7 @@ class Neo4jDriver:
     
     def get_concept_graph(self, concept_id: str, depth: int = 2):
         """Get related concepts up to specified depth."""
-        with self.driver.session() as session:
+        with track_upstream("neo4j"), self.driver.session() as session:
             result = session.run(
                 """
                 MATCH (c:Concept {id: $id})-[*1..""" + str(depth) + """]->(related)
@@ -48,10 +147,67 @@ class Neo4jDriver:
                 id=concept_id
             )
             return [record for record in result]
+    
+    def get_graph_version(self) -> int:
+        """Current value of the graph-wide write counter (0 before the first versioned write)."""
+        with track_upstream("neo4j"), self.driver.session() as session:
+            record = session.run("MATCH (v:GraphVersion {id: 'graph'}) RETURN v.value AS value").single()
+            return record["value"] if record else 0
+    
+    def get_subgraph_ids(self, seed_ids: Optional[List[str]], depth: int, as_of: Optional[int] = None) -> List[str]:
+        """Ids of concepts reachable from the seeds within `depth` hops (all concepts if no seeds).
+        
+        With `as_of`, only relationships that existed at that version are followed.
+        """
+        with track_upstream("neo4j"), self.driver.session() as session:
+            if seed_ids is None:
+                result = session.run("MATCH (c:Concept) RETURN c.id AS id")
+            else:
+                result = session.run(
+                    """
+                    MATCH (s:Concept) WHERE s.id IN $seeds
+                    MATCH p = (s)-[*0..""" + str(depth) + """]->(c:Concept)
+                    WHERE $as_of IS NULL OR all(r IN relationships(p) WHERE coalesce(r.version, 0) <= $as_of)
+                    RETURN DISTINCT c.id AS id
+                    """,
+                    seeds=seed_ids,
+                    as_of=as_of
+                )
+            return [record["id"] for record in result]
+    
+    def get_concepts(self, concept_ids: Iterable[str], since: Optional[int] = None,
+                     include: Iterable[str] = (), definitions: bool = True) -> List[Dict]:
+        """Concept properties for the given ids; with `since`, only those changed after it or in `include`."""
+        with track_upstream("neo4j"), self.driver.session() as session:
+            result = session.run(
+                """
+                MATCH (c:Concept) WHERE c.id IN $ids
+                  AND ($since IS NULL OR coalesce(c.version, 0) > $since OR c.id IN $include)
+                RETURN c.id AS id, c.name AS name,
+                       CASE WHEN $definitions THEN c.definition ELSE null END AS definition
+                """,
+                ids=list(concept_ids),
+                since=since,
+                include=list(include),
+                definitions=definitions
+            )
+            return [record.data() for record in result]
+    
+    def get_relations(self, concept_ids: Iterable[str], since: Optional[int] = None,
+                      include: Iterable[str] = ()) -> List[Dict]:
+        """Relationships between the given concepts; with `since`, only new ones or ones touching `include`."""
+        with track_upstream("neo4j"), self.driver.session() as session:
+            result = session.run(
+                """
+                MATCH (a:Concept)-[r]->(b:Concept) WHERE a.id IN $ids AND b.id IN $ids
+                  AND ($since IS NULL OR coalesce(r.version, 0) > $since OR a.id IN $include OR b.id IN $include)
+                RETURN a.id AS source, b.id AS target, type(r) AS type
+                """,
+                ids=list(concept_ids),
+                since=since,
+                include=list(include)
+            )
+            return [record.data() for record in result]
 
-# Initialize driver
-try:
-    neo4j_driver = Neo4jDriver()
-except Exception as e:
-    print(f"Warning: Could not connect to Neo4j: {e}")
-    neo4j_driver = None
+# Shared instance; connected from the app lifespan
+neo4j_driver = Neo4jDriver()
@@ -1,13 +1,41 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.config import settings
+from app.core.responses import ORJSONResponse
+from app.core.metrics import MetricsMiddleware, monitor_event_loop_lag, render_metrics
+from app.core.profiling import ProfilingMiddleware
 from app.db.database import init_db
-from app.routes import auth, ocr, quiz, knowledge_graph, ai
+from app.db.neo4j_driver import neo4j_driver
+from app.routes import auth, ocr, quiz, knowledge_graph, ai, admin, jobs
+from app.services.image_fetcher import image_fetcher
+from app.services.pipeline import scan_pipeline
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start slow dependencies in the background so the server accepts traffic immediately."""
+    app.state.db_init = asyncio.create_task(asyncio.to_thread(init_db))
+    background = [
+        asyncio.create_task(monitor_event_loop_lag()),
+        asyncio.create_task(neo4j_driver.connect_in_background()),
+    ]
+    await scan_pipeline.start()
+    yield
+    await scan_pipeline.stop()
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    neo4j_driver.close()
+    await image_fetcher.close()
 
 # Initialize FastAPI
 app = FastAPI(
     title="ARdent Study API",
     description="AR-Powered Contextual Learning Companion",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -18,11 +46,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-# Initialize database
-@app.on_event("startup")
-async def startup():
-    init_db()
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
 
 # Include routes
 app.include_router(auth.router)
@@ -30,6 +55,8 @@ app.include_router(ocr.router)
 app.include_router(ai.router)
 app.include_router(quiz.router)
 app.include_router(knowledge_graph.router)
+app.include_router(jobs.router)
+app.include_router(admin.router)
 
 @app.get("/")
 async def root():
@@ -42,9 +69,31 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check for monitoring."""
+    """Liveness check: the process is up and serving."""
     return {"status": "healthy"}
 
+def _task_status(task: asyncio.Task) -> str:
+    if not task.done():
+        return "starting"
+    return "failed" if task.cancelled() or task.exception() else "ready"
+
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """Readiness check: dependencies are initialized and requests can be served."""
+    checks = {
+        "database": _task_status(app.state.db_init),
+        "neo4j": neo4j_driver.status
+    }
+    ready = checks["database"] == "ready" and (neo4j_driver.is_ready or not settings.neo4j_required)
+    response.status_code = 200 if ready else 503
+    return {"status": "ready" if ready else "not_ready", "checks": checks}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics."""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, String, Integer, JSON, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, Float, JSON, DateTime, ForeignKey, Index
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from pydantic import BaseModel
 from typing import List, Optional
+from datetime import datetime
 from app.db.database import Base
 
 class Quiz(Base):
@@ -11,23 +13,38 @@ class Quiz(Base):
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     concept_id = Column(String, nullable=True)
     title = Column(String, nullable=False)
-    questions = Column(JSON, nullable=False)
+    # Full display payload (text, options, explanations); only loaded when accessed
+    questions = deferred(Column(JSON, nullable=False))
+    # Index of the correct option per question, so scoring never loads `questions`
+    answer_key = Column(JSON, nullable=True)
     score = Column(Integer, nullable=True)
     completed = Column(Integer, default=0)
     created_at = Column(DateTime, server_default=func.now())
 
 class LearningProgress(Base):
     __tablename__ = "learning_progress"
+    __table_args__ = (
+        Index("ix_learning_progress_user_concept", "user_id", "concept_id", unique=True),
+    )
     
     id = Column(String, primary_key=True, index=True)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     concept_id = Column(String, nullable=False)
-    mastery_level = Column(Integer, default=0)
+    mastery_level = Column(Float, default=0)
     review_count = Column(Integer, default=0)
     last_reviewed = Column(DateTime, nullable=True)
     next_review = Column(DateTime, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
 
+def build_answer_key(questions: List[dict]) -> List[int]:
+    """Option index of each question's correct answer (-1 if it is not one of the options)."""
+    key = []
+    for question in questions:
+        options = question.get("options") or []
+        correct = question.get("correct_answer")
+        key.append(options.index(correct) if correct in options else -1)
+    return key
+
 # Pydantic schemas
 class QuizQuestion(BaseModel):
     question: str
@@ -55,9 +72,9 @@ class LearningProgressResponse(BaseModel):
     id: str
     user_id: str
     concept_id: str
-    mastery_level: int
+    mastery_level: float
     review_count: int
-    next_review: Optional[str]
+    next_review: Optional[datetime]
     
     class Config:
         from_attributes = True
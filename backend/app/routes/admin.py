@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
+from fastapi.responses import PlainTextResponse
+import asyncio
+from app.core.config import settings
+from app.core.profiling import StackSampler, get_request_profile, get_slow_requests, is_valid_profiling_token
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+def require_profiling_token(x_profile_token: str = Header(None)):
+    """Dependency guarding the profiling endpoints."""
+    if not settings.profiling_token:
+        raise HTTPException(status_code=404, detail="Profiling disabled")
+    if not is_valid_profiling_token(x_profile_token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+def _render(profile, fmt: str):
+    if fmt == "speedscope":
+        return profile
+    return PlainTextResponse(profile)
+
+@router.get("/profile", dependencies=[Depends(require_profiling_token)])
+async def profile_process(
+    seconds: float = Query(10, gt=0),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$")
+):
+    """Sample every thread in the process for N seconds and return a flamegraph-ready profile."""
+    seconds = min(seconds, settings.profile_max_seconds)
+    sampler = StackSampler().start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        await sampler.stop_async()
+    return _render(sampler.render(format), format)
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_profiling_token)])
+def get_profile(profile_id: str):
+    """Fetch the profile captured for a request sent with X-Profile and X-Profile-Token."""
+    artifact = get_request_profile(profile_id)
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if artifact["format"] == "speedscope":
+        return artifact
+    return PlainTextResponse(artifact["profile"])
+
+@router.get("/requests/slow", dependencies=[Depends(require_profiling_token)])
+def slow_requests(limit: int = Query(20, ge=1, le=settings.slow_request_buffer_size)):
+    """Slowest recent requests with their db/llm/ocr/graph span breakdown."""
+    return {
+        "threshold_ms": settings.slow_request_threshold_ms,
+        "requests": get_slow_requests(limit)
+    }
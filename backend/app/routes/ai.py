@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from typing import List, Dict
 from app.services.ai_service import AIService
+from app.services.llm_limiter import LLMOverloadedError
 
 router = APIRouter(prefix="/api/ai", tags=["ai"])
 
@@ -14,5 +15,13 @@ async def enhance_concepts(request: Dict[str, List[str]]):
         
         enhancements = await AIService.get_enhancements(concepts)
         return enhancements
+    except HTTPException:
+        raise
+    except LLMOverloadedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(int(e.retry_after + 0.999))}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,66 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
+from app.core.config import settings
+from app.services.pipeline import STAGES, is_terminal, scan_pipeline
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+async def _get_job_or_404(job_id: str) -> dict:
+    job = await asyncio.to_thread(scan_pipeline.store.get_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """Get job status, current stage and the output of completed stages."""
+    job = await _get_job_or_404(job_id)
+    completed = [stage for stage in STAGES if stage in job["result"]]
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "progress": len(completed) / len(STAGES),
+        "result": job["result"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"]
+    }
+
+@router.get("/{job_id}/events")
+async def get_job_events(job_id: str, after: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=500)):
+    """Poll progress events newer than `after` (the last event id seen)."""
+    await _get_job_or_404(job_id)
+    events = await asyncio.to_thread(scan_pipeline.store.get_events, job_id, after, limit)
+    return {"job_id": job_id, "events": events}
+
+@router.get("/{job_id}/stream")
+async def stream_job_events(job_id: str, request: Request, after: int = Query(0, ge=0)):
+    """Subscribe to progress events as Server-Sent Events until the job finishes."""
+    await _get_job_or_404(job_id)
+
+    async def event_stream():
+        last_id = after
+        notified = scan_pipeline.subscribe(job_id)
+        try:
+            while not await request.is_disconnected():
+                notified.clear()
+                events = await asyncio.to_thread(scan_pipeline.store.get_events, job_id, last_id)
+                for event in events:
+                    last_id = event["id"]
+                    yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                if not events:
+                    job = await asyncio.to_thread(scan_pipeline.store.get_job, job_id)
+                    if is_terminal(job):
+                        break
+                    try:
+                        await asyncio.wait_for(notified.wait(), settings.job_poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            scan_pipeline.unsubscribe(job_id, notified)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
@@ -1,7 +1,12 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
 from typing import Optional
+from app.core.responses import compact_response
+from app.db.database import get_db
 from app.db.neo4j_driver import neo4j_driver
+from app.models.quiz import LearningProgress
+from app.services.graph_snapshot import GraphSnapshotService
 import uuid
 
 router = APIRouter(prefix="/api/knowledge-graph", tags=["knowledge-graph"])
@@ -19,8 +24,8 @@ class ConceptRelation(BaseModel):
 @router.post("/concepts/create")
 def create_concept(concept: ConceptNode):
     """Create a concept node in the knowledge graph."""
-    if not neo4j_driver:
-        raise HTTPException(status_code=500, detail="Neo4j not available")
+    if not neo4j_driver.is_ready:
+        raise HTTPException(status_code=503, detail="Neo4j not available")
     
     try:
         neo4j_driver.create_concept(concept.id, concept.name, concept.definition)
@@ -31,8 +36,8 @@ def create_concept(concept: ConceptNode):
 @router.post("/relations/create")
 def create_relation(relation: ConceptRelation):
     """Create a relationship between concepts."""
-    if not neo4j_driver:
-        raise HTTPException(status_code=500, detail="Neo4j not available")
+    if not neo4j_driver.is_ready:
+        raise HTTPException(status_code=503, detail="Neo4j not available")
     
     try:
         neo4j_driver.link_concepts(
@@ -47,11 +52,54 @@ def create_relation(relation: ConceptRelation):
 @router.get("/concepts/{concept_id}/graph")
 def get_concept_graph(concept_id: str, depth: int = 2):
     """Get the knowledge graph around a concept."""
-    if not neo4j_driver:
-        raise HTTPException(status_code=500, detail="Neo4j not available")
+    if not neo4j_driver.is_ready:
+        raise HTTPException(status_code=503, detail="Neo4j not available")
     
     try:
         graph = neo4j_driver.get_concept_graph(concept_id, depth)
         return {"concept_id": concept_id, "depth": depth, "nodes": graph}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+def _snapshot_response(seed_ids, depth, since, definitions, format, accept_encoding):
+    if not neo4j_driver.is_ready:
+        raise HTTPException(status_code=503, detail="Neo4j not available")
+    
+    try:
+        snapshot = GraphSnapshotService.snapshot(seed_ids, depth, since, definitions)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return compact_response(snapshot, format, accept_encoding)
+
+@router.get("/snapshot")
+def get_graph_snapshot(
+    root: Optional[str] = None,
+    depth: int = Query(2, ge=0, le=5),
+    since: Optional[str] = None,
+    definitions: bool = False,
+    format: str = Query("json", pattern="^(json|msgpack)$"),
+    accept_encoding: str = Header("")
+):
+    """Compact snapshot of the graph around `root` (whole graph if omitted); pass `since` for a delta."""
+    seed_ids = [root] if root else None
+    return _snapshot_response(seed_ids, depth, since, definitions, format, accept_encoding)
+
+@router.get("/snapshot/studied")
+def get_studied_snapshot(
+    user_id: str = Header(None),
+    depth: int = Query(0, ge=0, le=5),
+    since: Optional[str] = None,
+    definitions: bool = False,
+    format: str = Query("json", pattern="^(json|msgpack)$"),
+    accept_encoding: str = Header(""),
+    db: Session = Depends(get_db)
+):
+    """Compact snapshot of the concepts a user has studied, plus `depth` hops around them."""
+    if not user_id:
+        raise HTTPException(status_code=401, detail="user_id required")
+    
+    seed_ids = [
+        concept_id for (concept_id,) in
+        db.query(LearningProgress.concept_id).filter(LearningProgress.user_id == user_id)
+    ]
+    return _snapshot_response(seed_ids, depth, since, definitions, format, accept_encoding)
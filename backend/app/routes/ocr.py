@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException, File, UploadFile
 from app.models.ocr import OCRRequest, OCRResponse
+from app.services.image_fetcher import ImageFetchError, image_fetcher
 from app.services.ocr_service import OCRService
-import base64
+from app.services.pipeline import scan_pipeline
 
 router = APIRouter(prefix="/api/ocr", tags=["ocr"])
 
@@ -15,24 +16,31 @@ async def extract_text(request: OCRRequest):
         if request.image_base64:
             result = await OCRService.extract_text_from_image(request.image_base64)
         else:
-            # Download image from URL and convert to base64
-            import httpx
-            async with httpx.AsyncClient() as client:
-                response = await client.get(request.image_url)
-                image_base64 = base64.b64encode(response.content).decode()
-            result = await OCRService.extract_text_from_image(image_base64)
+            # Shared handout URLs are usually served from the local cache
+            image = await image_fetcher.fetch(request.image_url)
+            result = await OCRService.extract_text_from_bytes(image)
         
         return OCRResponse(**result)
+    except ImageFetchError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/upload")
+@router.post("/upload", status_code=202)
 async def upload_and_extract(file: UploadFile = File(...)):
-    """Upload image file and extract text."""
+    """Upload an image and queue a scan job (OCR, concepts, enhancement, graph insert)."""
+    content = await file.read()
+    if not content:
+        raise HTTPException(status_code=400, detail="Empty file")
+    
     try:
-        content = await file.read()
-        image_base64 = base64.b64encode(content).decode()
-        result = await OCRService.extract_text_from_image(image_base64)
-        return OCRResponse(**result)
+        job_id = await scan_pipeline.submit_scan(content, file.filename)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/api/jobs/{job_id}",
+        "events_url": f"/api/jobs/{job_id}/events"
+    }
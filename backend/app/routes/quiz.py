@@ -1,14 +1,53 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Header
+from sqlalchemy import Numeric, case, cast, func, or_
 from sqlalchemy.orm import Session
 import uuid
-from app.db.database import get_db
-from app.models.quiz import Quiz, QuizCreate, QuizResponse, LearningProgress, LearningProgressResponse
+from app.core.responses import ORJSONResponse, StreamingJSONArrayResponse
+from app.db.database import SessionLocal, dialect_insert, get_db
+from app.models.quiz import Quiz, QuizCreate, QuizResponse, LearningProgress, LearningProgressResponse, build_answer_key
 from app.services.ai_service import AIService
+from app.services.llm_limiter import LLMOverloadedError
 from app.services.spaced_repetition import SpacedRepetitionScheduler
 from datetime import datetime
 
 router = APIRouter(prefix="/api/quiz", tags=["quiz"])
 
+# Columns served by the progress endpoints, in LearningProgressResponse field order.
+# Rows come straight from the DB, so they are encoded without Pydantic re-validation.
+PROGRESS_COLUMNS = (
+    LearningProgress.id,
+    LearningProgress.user_id,
+    LearningProgress.concept_id,
+    LearningProgress.mastery_level,
+    LearningProgress.review_count,
+    LearningProgress.next_review
+)
+PROGRESS_FIELDS = tuple(column.key for column in PROGRESS_COLUMNS)
+
+def progress_row(row) -> dict:
+    return dict(zip(PROGRESS_FIELDS, row))
+
+def query_due_progress(db: Session, user_id: str, now: datetime = None, batch_size: int = 500):
+    """Due progress rows as tuples, using the same rule and order as
+    SpacedRepetitionScheduler.get_due_concepts but filtered in SQL.
+    
+    Returns a lazy query fetched `batch_size` rows at a time, so the response can
+    stream it; the session must stay open until iteration finishes."""
+    now = now or datetime.utcnow()
+    return db.query(*PROGRESS_COLUMNS).filter(
+        LearningProgress.user_id == user_id,
+        or_(LearningProgress.next_review.is_(None), LearningProgress.next_review <= now)
+    ).order_by(LearningProgress.next_review.asc().nullsfirst()).yield_per(batch_size)
+
+def stream_due_progress(user_id: str, batch_size: int = 500):
+    """Due progress rows from a session owned by the generator, so it stays open
+    exactly as long as the response body is being streamed."""
+    db = SessionLocal()
+    try:
+        yield from query_due_progress(db, user_id, batch_size=batch_size)
+    finally:
+        db.close()
+
 @router.post("/generate", response_model=QuizResponse)
 async def generate_quiz(quiz_data: QuizCreate, db: Session = Depends(get_db), user_id: str = None):
     """Generate a quiz for a concept using AI."""
@@ -19,23 +58,57 @@ async def generate_quiz(quiz_data: QuizCreate, db: Session = Depends(get_db), us
         # Get AI-generated questions
         questions = await AIService.generate_quiz_questions(quiz_data.concept_id)
         
-        # Create quiz
+        # Create quiz; keep the id locally since commit() expires the instance
+        quiz_id = str(uuid.uuid4())
         quiz = Quiz(
-            id=str(uuid.uuid4()),
+            id=quiz_id,
             user_id=user_id,
             concept_id=quiz_data.concept_id,
             title=quiz_data.title,
             questions=questions,
+            answer_key=build_answer_key(questions),
             completed=0
         )
         db.add(quiz)
         db.commit()
-        db.refresh(quiz)
         
-        return QuizResponse.from_orm(quiz)
+        # Questions were just produced by AIService; skip re-validating them through QuizResponse
+        return ORJSONResponse({
+            "id": quiz_id,
+            "user_id": user_id,
+            "concept_id": quiz_data.concept_id,
+            "title": quiz_data.title,
+            "questions": questions,
+            "score": None,
+            "completed": False
+        })
+    except HTTPException:
+        raise
+    except LLMOverloadedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(int(e.retry_after + 0.999))}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def score_answers(answers: dict, answer_key: list, questions: list = None) -> int:
+    """Count correct answers. Integer answers are option indices checked against the
+    answer key; text answers (the only way to match a -1 key entry) need the full
+    questions to compare with correct_answer."""
+    score = 0
+    for i, correct_index in enumerate(answer_key):
+        answer = answers.get(str(i))
+        if answer is None:
+            continue
+        if isinstance(answer, int) and not isinstance(answer, bool):
+            # -1 marks a correct answer that is not among the options; no index matches it
+            score += correct_index >= 0 and answer == correct_index
+        elif questions is not None:
+            score += answer == questions[i].get("correct_answer")
+    return score
+
 @router.post("/submit/{quiz_id}")
 async def submit_quiz(
     quiz_id: str,
@@ -44,69 +117,79 @@ async def submit_quiz(
     user_id: str = Header(None),
     db: Session = Depends(get_db)
 ):
-    """Submit quiz answers and calculate score."""
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
+    """Submit quiz answers (option indices, or option text) and calculate score."""
+    quiz = db.query(Quiz.concept_id, Quiz.answer_key).filter(Quiz.id == quiz_id).first()
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
-    # Calculate score
-    score = 0
-    for i, question in enumerate(quiz.questions):
-        if str(i) in answers and answers[str(i)] == question.get("correct_answer"):
-            score += 1
+    # Calculate score; the question payload is only loaded for text answers or legacy quizzes
+    answer_key = quiz.answer_key
+    questions = None
+    if answer_key is None or any(not isinstance(a, int) for a in answers.values()):
+        questions = db.query(Quiz.questions).filter(Quiz.id == quiz_id).scalar()
+        if answer_key is None:
+            answer_key = build_answer_key(questions)
+    score = score_answers(answers, answer_key, questions)
     
     # Update quiz
-    quiz.score = score
-    quiz.completed = 1
+    db.query(Quiz).filter(Quiz.id == quiz_id).update(
+        {"score": score, "completed": 1}, synchronize_session=False
+    )
     
-    # Update learning progress
+    # Update learning progress with a single upsert on (user_id, concept_id); the
+    # counters are incremented in SQL so concurrent submits cannot lose an update
     if quiz.concept_id:
-        progress = db.query(LearningProgress).filter(
-            LearningProgress.user_id == user_id,
-            LearningProgress.concept_id == quiz.concept_id
-        ).first()
-        
-        if not progress:
-            progress = LearningProgress(
+        now = datetime.utcnow()
+        quality_factor = SpacedRepetitionScheduler.quality_factor(quality)
+        # Round to the 0.2 step so float drift cannot push mastery just under a whole level
+        mastery = func.round(cast(LearningProgress.mastery_level + quality_factor, Numeric), 1)
+        insert = dialect_insert()
+        progress = db.execute(
+            insert(LearningProgress)
+            .values(
                 id=str(uuid.uuid4()),
                 user_id=user_id,
                 concept_id=quiz.concept_id,
-                mastery_level=0,
-                review_count=0
+                review_count=1,
+                mastery_level=max(0, min(5, quality_factor)),
+                last_reviewed=now
             )
-            db.add(progress)
+            .on_conflict_do_update(
+                index_elements=[LearningProgress.user_id, LearningProgress.concept_id],
+                set_={
+                    "review_count": LearningProgress.review_count + 1,
+                    "mastery_level": case((mastery < 0, 0), (mastery > 5, 5), else_=mastery),
+                    "last_reviewed": now
+                }
+            )
+            .returning(LearningProgress.id, LearningProgress.review_count, LearningProgress.mastery_level)
+        ).one()
         
-        # Update using spaced repetition
-        quality_score = quality
-        updates = SpacedRepetitionScheduler.schedule_next_review(
-            progress.review_count,
-            int(progress.mastery_level),
-            quality_score
+        # Schedule from the stored counters; a newer concurrent review reschedules itself
+        next_review = SpacedRepetitionScheduler.calculate_next_review(
+            progress.review_count, int(progress.mastery_level), now
         )
-        progress.review_count = updates["review_count"]
-        progress.mastery_level = updates["mastery_level"]
-        progress.next_review = datetime.fromisoformat(updates["next_review"])
-        progress.last_reviewed = datetime.utcnow()
+        db.query(LearningProgress).filter(
+            LearningProgress.id == progress.id,
+            LearningProgress.review_count == progress.review_count
+        ).update({"next_review": next_review}, synchronize_session=False)
     
     db.commit()
     
+    total = len(answer_key)
     return {
         "quiz_id": quiz_id,
         "score": score,
-        "total_questions": len(quiz.questions),
-        "percentage": (score / len(quiz.questions)) * 100 if quiz.questions else 0
+        "total_questions": total,
+        "percentage": (score / total) * 100 if total else 0
     }
 
 @router.get("/due", response_model=list[LearningProgressResponse])
-async def get_due_for_review(user_id: str = Header(None), db: Session = Depends(get_db)):
+async def get_due_for_review(user_id: str = Header(None)):
     """Get concepts due for review (spaced repetition)."""
-    concepts = db.query(LearningProgress).filter(
-        LearningProgress.user_id == user_id
-    ).all()
-    
-    due_concepts = SpacedRepetitionScheduler.get_due_concepts(concepts)
-    
-    return [LearningProgressResponse.from_orm(c) for c in due_concepts]
+    # Rows are fetched while the body streams, after the endpoint has returned, so
+    # they come from the stream's own session rather than the get_db dependency
+    return StreamingJSONArrayResponse(stream_due_progress(user_id), chunk_size=500, encode=progress_row)
 
 @router.get("/progress/{concept_id}", response_model=LearningProgressResponse)
 async def get_concept_progress(
@@ -115,12 +198,12 @@ async def get_concept_progress(
     db: Session = Depends(get_db)
 ):
     """Get learning progress for a specific concept."""
-    progress = db.query(LearningProgress).filter(
+    row = db.query(*PROGRESS_COLUMNS).filter(
         LearningProgress.user_id == user_id,
         LearningProgress.concept_id == concept_id
     ).first()
     
-    if not progress:
+    if not row:
         raise HTTPException(status_code=404, detail="No progress found")
     
-    return LearningProgressResponse.from_orm(progress)
+    return ORJSONResponse(progress_row(row))
@@ -1,21 +1,52 @@
 import httpx
 import json
+import re
+from collections import Counter
 from typing import List, Dict
 from app.core.config import settings
+from app.core.metrics import track_upstream
+from app.services.enhancement_batcher import EnhancementBatcher
+from app.services.llm_limiter import BACKGROUND, INTERACTIVE, LLMOverloadedError, estimate_tokens, llm_limiter, parse_retry_after
 
 class AIService:
     """AI wrapper for OpenAI and other AI services."""
     
     @staticmethod
-    async def get_enhancements(concepts: List[str]) -> Dict:
+    async def get_enhancements(concepts: List[str], priority: int = INTERACTIVE) -> Dict:
         """Get AI-enhanced concept explanations."""
         if settings.openai_api_key:
-            return await AIService._call_openai(concepts)
+            # Concurrent callers share one multi-concept prompt
+            return await _enhancement_batchers[priority].enhance(concepts)
         else:
             return AIService._mock_enhancements(concepts)
     
     @staticmethod
-    async def _call_openai(concepts: List[str]) -> Dict:
+    async def _chat_completion(prompt: str, priority: int = INTERACTIVE, completions: int = 1) -> str:
+        """Send a single-message chat completion through the admission controller."""
+        async with llm_limiter.slot(estimate_tokens(prompt, completions), priority) as slot:
+            with track_upstream("openai"):
+                async with httpx.AsyncClient() as client:
+                    response = await client.post(
+                        "https://api.openai.com/v1/chat/completions",
+                        headers={"Authorization": f"Bearer {settings.openai_api_key}"},
+                        json={
+                            "model": "gpt-3.5-turbo",
+                            "messages": [{"role": "user", "content": prompt}],
+                            "temperature": 0.7
+                        }
+                    )
+                    if response.status_code == 429:
+                        retry_after = parse_retry_after(response.headers.get("retry-after"))
+                        slot.record_rate_limited(retry_after)
+                        raise LLMOverloadedError("OpenAI rate limit reached", retry_after=retry_after)
+                    response.raise_for_status()
+                    data = response.json()
+            if "usage" in data:
+                slot.record_usage(data["usage"]["total_tokens"])
+        return data["choices"][0]["message"]["content"]
+    
+    @staticmethod
+    async def _call_openai(concepts: List[str], priority: int = INTERACTIVE) -> Dict:
         """Call OpenAI API for concept enhancement."""
         prompt = f"""For these learning concepts: {', '.join(concepts)}
         
@@ -27,20 +58,9 @@ Provide for each concept:
 
 Return as JSON with concept as key."""
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={"Authorization": f"Bearer {settings.openai_api_key}"},
-                json={
-                    "model": "gpt-3.5-turbo",
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.7
-                }
-            )
-            response.raise_for_status()
-            data = response.json()
-            content = data["choices"][0]["message"]["content"]
-            return json.loads(content)
+        # A batched prompt gets one answer per concept; charge the token budget for all of them
+        content = await AIService._chat_completion(prompt, priority, completions=len(concepts))
+        return json.loads(content)
     
     @staticmethod
     def _mock_enhancements(concepts: List[str]) -> Dict:
@@ -67,15 +87,19 @@ Return as JSON with concept as key."""
         return enhancements
     
     @staticmethod
-    async def generate_quiz_questions(concept: str, num_questions: int = 5) -> List[Dict]:
+    async def generate_quiz_questions(
+        concept: str,
+        num_questions: int = 5,
+        priority: int = INTERACTIVE
+    ) -> List[Dict]:
         """Generate quiz questions for a concept."""
         if settings.openai_api_key:
-            return await AIService._generate_with_openai(concept, num_questions)
+            return await AIService._generate_with_openai(concept, num_questions, priority)
         else:
             return AIService._generate_mock_questions(concept, num_questions)
     
     @staticmethod
-    async def _generate_with_openai(concept: str, num_questions: int) -> List[Dict]:
+    async def _generate_with_openai(concept: str, num_questions: int, priority: int = INTERACTIVE) -> List[Dict]:
         """Generate questions using OpenAI."""
         prompt = f"""Generate {num_questions} multiple-choice questions about "{concept}".
         
@@ -87,20 +111,9 @@ For each question, provide:
 
 Return as JSON array."""
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={"Authorization": f"Bearer {settings.openai_api_key}"},
-                json={
-                    "model": "gpt-3.5-turbo",
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.7
-                }
-            )
-            response.raise_for_status()
-            data = response.json()
-            content = data["choices"][0]["message"]["content"]
-            return json.loads(content)
+        # One completion estimate per requested question
+        content = await AIService._chat_completion(prompt, priority, completions=num_questions)
+        return json.loads(content)
     
     @staticmethod
     def _generate_mock_questions(concept: str, num_questions: int) -> List[Dict]:
@@ -119,3 +132,49 @@ Return as JSON array."""
                 "explanation": f"This is the correct answer because it directly relates to {concept}"
             })
         return questions
+    
+    @staticmethod
+    async def extract_concepts(text: str, max_concepts: int = 10, priority: int = BACKGROUND) -> List[Dict]:
+        """Extract key learning concepts from OCR text."""
+        if not text.strip():
+            return []
+        if settings.openai_api_key:
+            return await AIService._extract_with_openai(text, max_concepts, priority)
+        else:
+            return AIService._extract_mock_concepts(text, max_concepts)
+    
+    @staticmethod
+    async def _extract_with_openai(text: str, max_concepts: int, priority: int = BACKGROUND) -> List[Dict]:
+        """Extract concepts using OpenAI."""
+        prompt = f"""Identify up to {max_concepts} key learning concepts in this text:
+
+{text}
+
+For each concept, provide:
+- concept: The concept name
+- definition: A one-sentence definition based on the text
+- related_terms: List of related terms from the text
+
+Return as JSON array."""
+        
+        content = await AIService._chat_completion(prompt, priority)
+        return json.loads(content)[:max_concepts]
+    
+    @staticmethod
+    def _extract_mock_concepts(text: str, max_concepts: int) -> List[Dict]:
+        """Mock extraction: the most frequent longer words in the text."""
+        words = re.findall(r"[A-Za-z][A-Za-z-]{4,}", text.lower())
+        common = [word for word, _ in Counter(words).most_common(max_concepts)]
+        return [
+            {
+                "concept": word,
+                "definition": f"Key term found in the scanned text: {word}",
+                "related_terms": [other for other in common if other != word][:3]
+            }
+            for word in common
+        ]
+
+_enhancement_batchers = {
+    priority: EnhancementBatcher(AIService._call_openai, priority)
+    for priority in (INTERACTIVE, BACKGROUND)
+}
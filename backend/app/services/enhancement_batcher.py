@@ -0,0 +1,140 @@
+import asyncio
+import contextvars
+import time
+from typing import Awaitable, Callable, Dict, List
+from app.core.config import settings
+from app.core.metrics import ENHANCE_BATCH_SIZE, ENHANCE_CONCEPTS
+from app.core.profiling import record_span
+
+
+def _normalize(concept: str) -> str:
+    return " ".join(concept.split()).casefold()
+
+
+class _PendingConcept:
+    __slots__ = ("name", "waiters", "attempts")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.waiters = []
+        self.attempts = 0
+
+
+class EnhancementBatcher:
+    """Coalesces concept enhancement requests from concurrent callers.
+
+    Concepts requested within `window` seconds of the first pending one (or until
+    `max_batch` distinct concepts are pending) are sent as a single multi-concept
+    prompt, and each caller gets back only the concepts it asked for. The same
+    concept requested by several callers is fetched once. Concepts missing from
+    the reply are re-queued up to `max_retries` times before their callers fail.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[List[str], int], Awaitable[Dict]],
+        priority: int,
+        window: float = None,
+        max_batch: int = None,
+        max_retries: int = None
+    ):
+        self.fetch = fetch
+        self.priority = priority
+        self.window = settings.enhance_batch_window_ms / 1000 if window is None else window
+        self.max_batch = max_batch or settings.enhance_batch_max_size
+        self.max_retries = settings.enhance_batch_max_retries if max_retries is None else max_retries
+        self._pending: Dict[str, _PendingConcept] = {}
+        self._timer = None
+        self._inflight = set()
+
+    async def enhance(self, concepts: List[str]) -> Dict:
+        """Enhance concepts via the shared batch; returns {concept: enhancement}."""
+        futures = {}
+        start = time.perf_counter()
+        for concept in dict.fromkeys(concepts):
+            futures[concept] = self._enqueue(concept)
+        results = await asyncio.gather(*futures.values(), return_exceptions=True)
+        # The batch runs outside any request; each caller is charged for its own wait
+        record_span("llm", time.perf_counter() - start)
+
+        enhancements = {}
+        errors = []
+        for concept, result in zip(futures, results):
+            if isinstance(result, BaseException):
+                errors.append(result)
+            else:
+                enhancements[concept] = result
+        # Partial results are still useful; only fail when nothing came back
+        if errors and not enhancements:
+            raise errors[0]
+        return enhancements
+
+    def _enqueue(self, concept: str, pending: _PendingConcept = None) -> asyncio.Future:
+        key = _normalize(concept)
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = pending or _PendingConcept(concept)
+            self._pending[key] = entry
+        elif pending is not None:
+            entry.waiters.extend(pending.waiters)
+
+        future = None
+        if pending is None:
+            future = asyncio.get_running_loop().create_future()
+            entry.waiters.append(future)
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        # Start the batch in an empty context: it serves many requests, and inheriting
+        # the flushing caller's trace would credit the whole LLM call to that request
+        task = contextvars.Context().run(asyncio.create_task, self._run_batch(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _run_batch(self, batch: Dict[str, _PendingConcept]):
+        ENHANCE_BATCH_SIZE.observe(len(batch))
+        try:
+            reply = await self.fetch([entry.name for entry in batch.values()], self.priority)
+        except Exception as e:
+            ENHANCE_CONCEPTS.labels("failed").inc(len(batch))
+            for entry in batch.values():
+                self._resolve(entry, exception=e)
+            return
+
+        by_key = {
+            _normalize(name): value
+            for name, value in (reply.items() if isinstance(reply, dict) else [])
+            if isinstance(value, dict)
+        }
+        for key, entry in batch.items():
+            if key in by_key:
+                ENHANCE_CONCEPTS.labels("ok").inc()
+                self._resolve(entry, result=by_key[key])
+            elif entry.attempts < self.max_retries:
+                ENHANCE_CONCEPTS.labels("requeued").inc()
+                entry.attempts += 1
+                self._enqueue(entry.name, pending=entry)
+            else:
+                ENHANCE_CONCEPTS.labels("failed").inc()
+                self._resolve(entry, exception=LookupError(f"No enhancement returned for '{entry.name}'"))
+
+    @staticmethod
+    def _resolve(entry: _PendingConcept, result=None, exception: Exception = None):
+        for future in entry.waiters:
+            if future.done():
+                continue
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
@@ -0,0 +1,101 @@
+import hashlib
+from typing import Dict, List, Optional
+from app.db.neo4j_driver import neo4j_driver
+
+
+class GraphSnapshotService:
+    """Compact, versioned exports of knowledge-graph subgraphs for client visualization.
+
+    Payloads are columnar: `nodes` holds one array per field, `edges` holds
+    parallel `source`/`target` arrays of node positions plus a `type` index into
+    `edge_types`. Positions are local to one payload; clients merge deltas by
+    node id. Each payload carries a `version` cursor; passing it back as `since`
+    returns only what changed, or a full snapshot (`full: true`) if the cursor
+    belongs to another scope.
+    """
+
+    @staticmethod
+    def scope_key(seed_ids: Optional[List[str]], depth: int) -> str:
+        """Short hash identifying a subgraph, so cursors are not reused across scopes."""
+        digest = hashlib.sha1(str(depth).encode())
+        digest.update(b"*" if seed_ids is None else "\0".join(sorted(seed_ids)).encode())
+        return digest.hexdigest()[:12]
+
+    @staticmethod
+    def parse_cursor(cursor: Optional[str], scope: str) -> Optional[int]:
+        """Graph version from a cursor issued for the same scope, else None."""
+        try:
+            version, key = cursor.split("-", 1)
+            version = int(version)
+        except (AttributeError, ValueError):
+            return None
+        return version if key == scope and version >= 0 else None
+
+    @staticmethod
+    def build(nodes: List[Dict], edges: List[Dict], version: str, since: Optional[str],
+              definitions: bool = False) -> Dict:
+        """Pack node and relationship rows into the columnar snapshot format."""
+        index = {}
+        columns = {"id": [], "name": []}
+        if definitions:
+            columns["definition"] = []
+        for node in nodes:
+            if node["id"] in index:
+                continue
+            index[node["id"]] = len(index)
+            for field, column in columns.items():
+                column.append(node.get(field))
+
+        edge_types = {}
+        source, target, types = [], [], []
+        for edge in edges:
+            s = index.get(edge["source"])
+            t = index.get(edge["target"])
+            if s is None or t is None:
+                continue
+            source.append(s)
+            target.append(t)
+            types.append(edge_types.setdefault(edge["type"], len(edge_types)))
+
+        return {
+            "version": version,
+            "since": since,
+            "full": since is None,
+            "nodes": columns,
+            "edges": {"source": source, "target": target, "type": types},
+            "edge_types": list(edge_types),
+        }
+
+    @staticmethod
+    def snapshot(seed_ids: Optional[List[str]], depth: int, since: Optional[str] = None,
+                 definitions: bool = False) -> Dict:
+        """Subgraph reachable from `seed_ids` (whole graph if None), in full or as a delta since a cursor."""
+        scope = GraphSnapshotService.scope_key(seed_ids, depth)
+        # Read the version before the data: writes that land meanwhile are sent
+        # again with the next delta rather than missed
+        version = neo4j_driver.get_graph_version()
+        cursor = f"{version}-{scope}"
+        since_version = GraphSnapshotService.parse_cursor(since, scope)
+        if since_version is not None and since_version > version:
+            since_version = None
+        if since_version is None:
+            since = None
+        elif since_version == version:
+            return GraphSnapshotService.build([], [], cursor, since, definitions)
+
+        ids = neo4j_driver.get_subgraph_ids(seed_ids, depth)
+        if since_version is None:
+            nodes = neo4j_driver.get_concepts(ids, definitions=definitions)
+            edges = neo4j_driver.get_relations(ids)
+            return GraphSnapshotService.build(nodes, edges, cursor, None, definitions)
+
+        # New relationships can pull unchanged concepts into the subgraph; those
+        # are sent along with everything stamped after the cursor
+        fresh = []
+        if seed_ids is not None:
+            before = set(neo4j_driver.get_subgraph_ids(seed_ids, depth, as_of=since_version))
+            fresh = [concept_id for concept_id in ids if concept_id not in before]
+        edges = neo4j_driver.get_relations(ids, since_version, fresh)
+        endpoints = {edge["source"] for edge in edges} | {edge["target"] for edge in edges}
+        nodes = neo4j_driver.get_concepts(ids, since_version, endpoints.union(fresh), definitions)
+        return GraphSnapshotService.build(nodes, edges, cursor, since, definitions)
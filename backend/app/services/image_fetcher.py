@@ -0,0 +1,238 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+import aiofiles
+import httpx
+from app.core.config import settings
+from app.core.metrics import record_cache, track_upstream
+
+
+class ImageFetchError(Exception):
+    """The image URL could not be fetched or did not return an acceptable image."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ImageFetcher:
+    """Downloads images by URL for OCR, with a disk cache shared across requests.
+
+    - Downloads are streamed and aborted once they exceed `max_bytes`; the
+      response must declare an image/* content type.
+    - Entries younger than `max_age` are served without touching the network;
+      older ones are revalidated with If-None-Match / If-Modified-Since.
+    - Concurrent fetches of the same URL share one download.
+    - The cache is trimmed to `max_cache_bytes`, least recently fetched first.
+      Its size is tracked incrementally; the directory is only walked once at
+      first use and when a prune is due, which trims to 90% so walks stay rare.
+    """
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None, max_age: float = None):
+        self.cache_dir = cache_dir or settings.image_cache_dir
+        self.max_bytes = max_bytes or settings.image_fetch_max_bytes
+        self.max_age = settings.image_cache_max_age if max_age is None else max_age
+        self.max_cache_bytes = settings.image_cache_max_bytes
+        self._cache_bytes: Optional[int] = None
+        self._size_lock = threading.Lock()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.image_fetch_timeout, connect=settings.image_fetch_connect_timeout),
+                follow_redirects=True,
+                max_redirects=5
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch(self, url: str) -> bytes:
+        """Return the image bytes for a URL, from cache when possible."""
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or not parsed.netloc:
+            raise ImageFetchError("image_url must be an http(s) URL")
+
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(url))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        # Shield so one caller disconnecting does not cancel the download for the others
+        return await asyncio.shield(task)
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base + ".img", base + ".json"
+
+    async def _read_cached(self, body_path: str, meta_path: str):
+        try:
+            async with aiofiles.open(meta_path, "r") as f:
+                meta = json.loads(await f.read())
+            async with aiofiles.open(body_path, "rb") as f:
+                return meta, await f.read()
+        except (OSError, ValueError):
+            return None, None
+
+    @staticmethod
+    def _atomic_write(path: str, data: bytes):
+        # Unique temp name in the entry's directory, then rename, so concurrent
+        # writers (other workers included) never interleave or expose a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _write_cached(self, body_path: str, meta_path: str, meta: dict, body: Optional[bytes]):
+        """Store an entry (blocking); returns the change in cached body bytes."""
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        growth = 0
+        if body is not None:
+            try:
+                growth -= os.path.getsize(body_path)
+            except OSError:
+                pass
+            self._atomic_write(body_path, body)
+            growth += len(body)
+        elif os.path.exists(body_path):
+            # Revalidated entries count as recently fetched when pruning
+            os.utime(body_path)
+        self._atomic_write(meta_path, json.dumps(meta).encode())
+        return growth
+
+    def _scan(self):
+        """Cached bodies as (mtime, size, path), and their total size; drops stale temp files."""
+        entries = []
+        total = 0
+        now = time.time()
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith(".tmp"):
+                    # Left behind by a writer that died mid-write
+                    if now - stat.st_mtime > 3600:
+                        self._remove(path)
+                    continue
+                if name.endswith(".img"):
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+        return entries, total
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _store(self, body_path: str, meta_path: str, meta: dict, body: Optional[bytes]):
+        """Write an entry and prune if the tracked size went over the limit (blocking)."""
+        growth = self._write_cached(body_path, meta_path, meta, body)
+        with self._size_lock:
+            if self._cache_bytes is None:
+                self._cache_bytes = self._scan()[1]
+            else:
+                self._cache_bytes += growth
+            if self._cache_bytes > self.max_cache_bytes:
+                self._prune()
+
+    def _prune(self):
+        # Re-scan rather than trust the counter: other workers share the directory
+        entries, total = self._scan()
+        target = self.max_cache_bytes * 0.9
+        entries.sort()
+        for _, size, path in entries:
+            if total <= target:
+                break
+            self._remove(path)
+            self._remove(path[:-len(".img")] + ".json")
+            total -= size
+        self._cache_bytes = total
+
+    async def _fetch(self, url: str) -> bytes:
+        body_path, meta_path = self._paths(url)
+        meta, cached = await self._read_cached(body_path, meta_path)
+
+        if cached is not None and time.time() - meta["fetched_at"] < self.max_age:
+            record_cache("image_fetch", True)
+            return cached
+
+        headers = {"Accept": "image/*"}
+        if cached is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            with track_upstream("image_fetch"):
+                async with self._get_client().stream("GET", url, headers=headers) as response:
+                    if response.status_code == 304 and cached is not None:
+                        record_cache("image_fetch", True)
+                        meta["fetched_at"] = time.time()
+                        await asyncio.to_thread(self._store, body_path, meta_path, meta, None)
+                        return cached
+                    body = await self._read_body(response)
+        except httpx.TimeoutException:
+            raise ImageFetchError("Timed out fetching image_url", status_code=504)
+        except httpx.RequestError as e:
+            raise ImageFetchError(f"Could not fetch image_url: {e}", status_code=502)
+
+        record_cache("image_fetch", False)
+        await asyncio.to_thread(self._store, body_path, meta_path, {
+            "url": url,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "content_type": response.headers.get("content-type"),
+            "fetched_at": time.time()
+        }, body)
+        return body
+
+    async def _read_body(self, response: httpx.Response) -> bytes:
+        if response.status_code >= 400:
+            raise ImageFetchError(f"image_url returned HTTP {response.status_code}", status_code=502)
+
+        content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+        if not content_type.startswith("image/"):
+            raise ImageFetchError(f"image_url is not an image (content-type: {content_type or 'missing'})",
+                                  status_code=415)
+
+        declared = response.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            raise ImageFetchError(f"Image exceeds {self.max_bytes} bytes", status_code=413)
+
+        chunks = []
+        total = 0
+        async for chunk in response.aiter_bytes():
+            total += len(chunk)
+            if total > self.max_bytes:
+                raise ImageFetchError(f"Image exceeds {self.max_bytes} bytes", status_code=413)
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+
+# Shared instance; the HTTP client is closed from the app lifespan
+image_fetcher = ImageFetcher()
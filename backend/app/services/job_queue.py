@@ -0,0 +1,282 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+from app.core.config import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    payload TEXT NOT NULL,
+    result TEXT NOT NULL DEFAULT '{}',
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL REFERENCES jobs(id),
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS ix_job_tasks_claim ON job_tasks (stage, status, available_at);
+CREATE TABLE IF NOT EXISTS job_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL REFERENCES jobs(id),
+    type TEXT NOT NULL,
+    stage TEXT,
+    data TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_job_events_job ON job_events (job_id, id);
+"""
+
+# Columns added after the first release; created on existing databases at connect
+MIGRATIONS = {
+    "job_tasks": [("lease_owner", "TEXT"), ("lease_until", "REAL")],
+}
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+class LeaseLostError(Exception):
+    """The task's lease expired and it may now belong to another worker."""
+
+
+class JobStore:
+    """SQLite-backed durable job queue.
+
+    A job moves through stages; each stage run is a row in job_tasks that workers
+    claim atomically. A claim is a lease: the worker renews it while the task
+    runs, and only tasks whose lease has expired are handed to another worker,
+    so several processes can share one database. Finishing a task whose lease
+    was lost raises LeaseLostError instead of recording a duplicate result.
+    Every state change is appended to job_events so clients can follow progress.
+    All methods are blocking; call them via asyncio.to_thread.
+    """
+
+    def __init__(self, path: str = None, lease_seconds: float = None):
+        self.path = path or settings.jobs_db_path
+        self.lease_seconds = lease_seconds or settings.job_lease_seconds
+        self._local = threading.local()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.executescript(SCHEMA)
+                    self._migrate(conn)
+                    self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _migrate(conn):
+        for table, columns in MIGRATIONS.items():
+            existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for name, column_type in columns:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+    def _transaction(self):
+        conn = self._conn()
+        return _Transaction(conn)
+
+    @staticmethod
+    def _add_event(conn, job_id: str, event_type: str, stage: Optional[str] = None, data: Optional[dict] = None):
+        conn.execute(
+            "INSERT INTO job_events (job_id, type, stage, data, created_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, event_type, stage, json.dumps(data) if data is not None else None, time.time())
+        )
+
+    def create_job(self, kind: str, payload: dict, first_stage: str) -> str:
+        """Persist a new job and queue its first stage."""
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, stage, payload, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, kind, first_stage, json.dumps(payload), now, now)
+            )
+            conn.execute(
+                "INSERT INTO job_tasks (job_id, stage, status, available_at) VALUES (?, ?, 'queued', ?)",
+                (job_id, first_stage, now)
+            )
+            self._add_event(conn, job_id, "queued", first_stage)
+        return job_id
+
+    def claim(self, stage: str) -> Optional[Dict]:
+        """Atomically take the oldest runnable task for a stage, or None."""
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id, job_id, attempts FROM job_tasks "
+                "WHERE stage = ? AND status = 'queued' AND available_at <= ? ORDER BY id LIMIT 1",
+                (stage, time.time())
+            ).fetchone()
+            if row is None:
+                return None
+            attempt = row["attempts"] + 1
+            owner = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE job_tasks SET status = 'running', attempts = ?, lease_owner = ?, lease_until = ? "
+                "WHERE id = ?",
+                (attempt, owner, time.time() + self.lease_seconds, row["id"])
+            )
+            job = conn.execute("SELECT payload, result FROM jobs WHERE id = ?", (row["job_id"],)).fetchone()
+            conn.execute(
+                "UPDATE jobs SET status = 'running', stage = ?, updated_at = ? WHERE id = ?",
+                (stage, time.time(), row["job_id"])
+            )
+            self._add_event(conn, row["job_id"], "stage_started", stage, {"attempt": attempt})
+        return {
+            "task_id": row["id"],
+            "job_id": row["job_id"],
+            "stage": stage,
+            "attempt": attempt,
+            "lease_owner": owner,
+            "payload": json.loads(job["payload"]),
+            "result": json.loads(job["result"]),
+        }
+
+    @staticmethod
+    def _finish_task(conn, task: Dict, status: str, available_at: Optional[float] = None):
+        """Move a task we hold the lease for out of 'running'; raises if the lease was lost."""
+        updated = conn.execute(
+            "UPDATE job_tasks SET status = ?, available_at = COALESCE(?, available_at), "
+            "lease_owner = NULL, lease_until = NULL "
+            "WHERE id = ? AND status = 'running' AND lease_owner = ?",
+            (status, available_at, task["task_id"], task["lease_owner"])
+        ).rowcount
+        if not updated:
+            raise LeaseLostError(f"Lease on task {task['task_id']} was lost")
+
+    def renew(self, task: Dict) -> bool:
+        """Extend the lease on a running task; False if it is no longer ours."""
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE job_tasks SET lease_until = ? WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (time.time() + self.lease_seconds, task["task_id"], task["lease_owner"])
+            ).rowcount > 0
+
+    def complete_stage(self, task: Dict, output, next_stage: Optional[str], progress: float):
+        """Store a stage's output and queue the next stage, or finish the job."""
+        now = time.time()
+        result = dict(task["result"], **{task["stage"]: output})
+        with self._transaction() as conn:
+            self._finish_task(conn, task, "done")
+            self._add_event(conn, task["job_id"], "stage_completed", task["stage"], {"progress": progress})
+            if next_stage:
+                conn.execute(
+                    "INSERT INTO job_tasks (job_id, stage, status, available_at) VALUES (?, ?, 'queued', ?)",
+                    (task["job_id"], next_stage, now)
+                )
+                conn.execute(
+                    "UPDATE jobs SET stage = ?, result = ?, updated_at = ? WHERE id = ?",
+                    (next_stage, json.dumps(result), now, task["job_id"])
+                )
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = 'succeeded', stage = NULL, result = ?, updated_at = ? WHERE id = ?",
+                    (json.dumps(result), now, task["job_id"])
+                )
+                self._add_event(conn, task["job_id"], "succeeded")
+
+    def retry(self, task: Dict, error: str, delay: float):
+        """Put a failed task back in the queue after a delay."""
+        with self._transaction() as conn:
+            self._finish_task(conn, task, "queued", time.time() + delay)
+            # The job is waiting out its backoff, not running
+            conn.execute(
+                "UPDATE jobs SET status = 'retrying', updated_at = ? WHERE id = ?",
+                (time.time(), task["job_id"])
+            )
+            self._add_event(conn, task["job_id"], "retry_scheduled", task["stage"], {
+                "attempt": task["attempt"], "error": error, "delay": delay
+            })
+
+    def fail(self, task: Dict, error: str):
+        """Give up on a task and mark its job failed."""
+        with self._transaction() as conn:
+            self._finish_task(conn, task, "failed")
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                (error, time.time(), task["job_id"])
+            )
+            self._add_event(conn, task["job_id"], "failed", task["stage"], {"error": error})
+
+    def recover(self) -> int:
+        """Requeue running tasks whose lease expired (their worker stopped or hung)."""
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, job_id, stage FROM job_tasks "
+                "WHERE status = 'running' AND (lease_until IS NULL OR lease_until < ?)",
+                (now,)
+            ).fetchall()
+            for row in rows:
+                conn.execute(
+                    "UPDATE job_tasks SET status = 'queued', available_at = ?, lease_owner = NULL, "
+                    "lease_until = NULL WHERE id = ?",
+                    (now, row["id"])
+                )
+                conn.execute("UPDATE jobs SET status = 'queued', updated_at = ? WHERE id = ?", (now, row["job_id"]))
+                self._add_event(conn, row["job_id"], "resumed", row["stage"])
+        return len(rows)
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"])
+        return job
+
+    def get_events(self, job_id: str, after: int = 0, limit: int = 100) -> List[Dict]:
+        rows = self._conn().execute(
+            "SELECT id, type, stage, data, created_at FROM job_events "
+            "WHERE job_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (job_id, after, limit)
+        ).fetchall()
+        return [
+            {**dict(row), "data": json.loads(row["data"]) if row["data"] else None}
+            for row in rows
+        ]
+
+    def queue_depths(self) -> Dict[str, int]:
+        rows = self._conn().execute(
+            "SELECT stage, COUNT(*) AS n FROM job_tasks WHERE status IN ('queued', 'running') GROUP BY stage"
+        ).fetchall()
+        return {row["stage"]: row["n"] for row in rows}
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK, so claims never race between workers."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
@@ -0,0 +1,213 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from app.core.config import settings
+from app.core.metrics import LLM_CONCURRENCY_LIMIT, LLM_IN_FLIGHT, LLM_QUEUE_WAIT, LLM_REJECTIONS
+
+# Priority lanes; lower runs first
+INTERACTIVE = 0
+BACKGROUND = 1
+LANE_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+
+class LLMOverloadedError(Exception):
+    """Raised when a call cannot be admitted in time or the provider rate-limits us."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_tokens(prompt: str, completions: int = 1) -> int:
+    """Rough prompt + completion token estimate (~4 characters per token).
+    
+    `completions` is how many answers the prompt asks for, e.g. concepts in a batch.
+    """
+    return len(prompt) // 4 + settings.llm_completion_token_estimate * max(1, completions)
+
+
+def parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date form)."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class _Slot:
+    """Handle for one admitted call; lets the caller report what the provider said."""
+
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+        self.actual_tokens: Optional[int] = None
+        self.throttled = False
+        self.retry_after = 0.0
+
+    def record_usage(self, total_tokens: int):
+        self.actual_tokens = total_tokens
+
+    def record_rate_limited(self, retry_after: float):
+        self.throttled = True
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter:
+    """Admission control for outbound LLM calls.
+
+    - Concurrency limit adapts AIMD-style: +1/limit per call that finishes under
+      the latency target, x0.9 when latency exceeds it, x0.5 on a 429.
+    - A tokens-per-minute bucket is charged with an estimate up front and
+      corrected with the reported usage afterwards. A 429 also pauses admission
+      for the provider's Retry-After.
+    - Waiters queue by (lane, arrival); interactive calls always go first.
+    - A call that cannot be admitted before its lane's queue timeout fails
+      immediately with LLMOverloadedError instead of piling up.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = None,
+        min_limit: float = None,
+        max_limit: float = None,
+        target_latency: float = None,
+        tokens_per_minute: int = None,
+    ):
+        self.limit = float(initial_limit or settings.llm_initial_concurrency)
+        self.min_limit = float(min_limit or settings.llm_min_concurrency)
+        self.max_limit = float(max_limit or settings.llm_max_concurrency)
+        self.target_latency = target_latency or settings.llm_target_latency
+        self.capacity = float(tokens_per_minute or settings.llm_tokens_per_minute)
+        self.refill_rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.in_flight = 0
+        self.queue_timeouts = {
+            INTERACTIVE: settings.llm_queue_timeout,
+            BACKGROUND: settings.llm_background_queue_timeout,
+        }
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0.0
+        self._paused_until = 0.0
+        self._waiters = []
+        self._seq = itertools.count()
+        LLM_CONCURRENCY_LIMIT.set(self.limit)
+
+    @asynccontextmanager
+    async def slot(self, tokens: int, priority: int = INTERACTIVE):
+        """Wait for admission, run the call, then adapt the limit from its outcome."""
+        tokens = int(min(tokens, self.capacity))
+        await self._admit(tokens, priority)
+        slot = _Slot(tokens)
+        start = time.monotonic()
+        failed = False
+        try:
+            yield slot
+        except BaseException:
+            # Includes cancellation: an abandoned call must not count as a fast success
+            failed = True
+            raise
+        finally:
+            self._release(slot, time.monotonic() - start, failed)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last_refill) * self.refill_rate)
+        self._last_refill = now
+
+    def _must_queue(self, key) -> bool:
+        self._prune()
+        if self.in_flight >= max(1, int(self.limit)):
+            return True
+        return bool(self._waiters) and self._waiters[0][0] < key
+
+    def _prune(self):
+        while self._waiters and self._waiters[0][1].done():
+            heapq.heappop(self._waiters)
+
+    def _wake_next(self):
+        self._prune()
+        if self._waiters and self.in_flight < max(1, int(self.limit)):
+            _, future = heapq.heappop(self._waiters)
+            future.set_result(None)
+
+    async def _admit(self, tokens: int, priority: int):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = start + self.queue_timeouts[priority]
+        key = (priority, next(self._seq))
+        lane = LANE_NAMES[priority]
+        while True:
+            token_wait = None
+            if not self._must_queue(key):
+                self._refill()
+                paused = self._paused_until - time.monotonic()
+                if paused > 0:
+                    token_wait = paused
+                elif self.tokens >= tokens:
+                    self.tokens -= tokens
+                    self.in_flight += 1
+                    LLM_IN_FLIGHT.set(self.in_flight)
+                    LLM_QUEUE_WAIT.labels(lane).observe(loop.time() - start)
+                    # A free slot may remain for the next waiter
+                    self._wake_next()
+                    return
+                else:
+                    token_wait = (tokens - self.tokens) / self.refill_rate
+
+            remaining = deadline - loop.time()
+            if remaining <= 0 or (token_wait is not None and token_wait > remaining):
+                LLM_REJECTIONS.labels(lane).inc()
+                # Let the next waiter try; it may need fewer tokens
+                self._wake_next()
+                raise LLMOverloadedError(
+                    "LLM capacity exhausted, try again later",
+                    retry_after=max(1.0, token_wait or self.target_latency)
+                )
+
+            future = loop.create_future()
+            heapq.heappush(self._waiters, (key, future))
+            try:
+                await asyncio.wait_for(future, min(token_wait or remaining, remaining))
+            except asyncio.TimeoutError:
+                pass
+
+    def _release(self, slot: _Slot, latency: float, failed: bool):
+        self.in_flight -= 1
+        if slot.actual_tokens is not None:
+            self.tokens += slot.tokens - slot.actual_tokens
+
+        now = time.monotonic()
+        if slot.throttled:
+            self._decrease(0.5, now)
+            # Stop admitting until the provider's Retry-After has passed
+            self._paused_until = max(self._paused_until, now + slot.retry_after)
+        elif failed:
+            pass
+        elif latency > self.target_latency:
+            self._decrease(0.9, now)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+        LLM_CONCURRENCY_LIMIT.set(self.limit)
+        LLM_IN_FLIGHT.set(self.in_flight)
+        self._wake_next()
+
+    def _decrease(self, factor: float, now: float):
+        # At most one decrease per latency window; a burst of 429s is one signal
+        if now - self._last_decrease < self.target_latency:
+            return
+        self.limit = max(self.min_limit, self.limit * factor)
+        self._last_decrease = now
+
+
+# Shared instance for all AIService calls
+llm_limiter = AdaptiveLimiter()
@@ -1,54 +1,82 @@
+import asyncio
 import httpx
 import base64
 from io import BytesIO
-from PIL import Image
-import pytesseract
 from app.core.config import settings
+from app.core.metrics import track_ocr_queue, track_upstream
 from typing import Optional
 
+class OCRError(Exception):
+    """Raised instead of returning mock text when the caller cannot use a placeholder."""
+
 class OCRService:
     """OCR service with pluggable implementation."""
     
     @staticmethod
     async def extract_text_from_image(image_base64: str) -> dict:
         """Extract text from base64 encoded image."""
-        try:
-            # Try external API first
-            if settings.openai_api_key:
-                return await OCRService._call_external_ocr(image_base64)
-        except Exception as e:
-            print(f"External OCR failed: {e}")
+        return await OCRService._extract(image_base64=image_base64)
+    
+    @staticmethod
+    async def extract_text_from_bytes(image_data: bytes, allow_mock: bool = True) -> dict:
+        """Extract text from raw image bytes (uploads, fetched URLs) without a base64 round trip.
         
-        # Fallback to local pytesseract
-        return await OCRService._call_local_ocr(image_base64)
+        With allow_mock=False, OCR failure raises OCRError instead of returning sample text.
+        """
+        return await OCRService._extract(image_data=image_data, allow_mock=allow_mock)
+    
+    @staticmethod
+    async def _extract(image_data: Optional[bytes] = None, image_base64: Optional[str] = None,
+                       allow_mock: bool = True) -> dict:
+        with track_ocr_queue():
+            try:
+                # Try external API first; it takes base64 on the wire
+                if settings.openai_api_key:
+                    if image_base64 is None:
+                        image_base64 = base64.b64encode(image_data).decode()
+                    return await OCRService._call_external_ocr(image_base64)
+            except Exception as e:
+                print(f"External OCR failed: {e}")
+            
+            # Fallback to local pytesseract
+            return await OCRService._call_local_ocr(image_data, image_base64, allow_mock)
     
     @staticmethod
     async def _call_external_ocr(image_base64: str) -> dict:
         """Call external OCR API (pluggable)."""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                settings.ocr_api_url,
-                json={"image": image_base64},
-                headers={"Authorization": f"Bearer {settings.ocr_api_key}"}
-            )
-            response.raise_for_status()
-            data = response.json()
-            return {
-                "extracted_text": data.get("text", ""),
-                "confidence": data.get("confidence", 0.9),
-                "language": data.get("language", "en")
-            }
+        with track_upstream("ocr_api"):
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    settings.ocr_api_url,
+                    json={"image": image_base64},
+                    headers={"Authorization": f"Bearer {settings.ocr_api_key}"}
+                )
+                response.raise_for_status()
+                data = response.json()
+        return {
+            "extracted_text": data.get("text", ""),
+            "confidence": data.get("confidence", 0.9),
+            "language": data.get("language", "en")
+        }
     
     @staticmethod
-    async def _call_local_ocr(image_base64: str) -> dict:
+    async def _call_local_ocr(image_data: Optional[bytes], image_base64: Optional[str] = None,
+                              allow_mock: bool = True) -> dict:
         """Fallback to local pytesseract implementation."""
         try:
-            # Decode base64
-            image_data = base64.b64decode(image_base64)
+            # Imported on first use: PIL and pytesseract are slow to load
+            from PIL import Image
+            import pytesseract
+            
+            # Decode base64 only when the caller did not have raw bytes
+            if image_data is None:
+                image_data = base64.b64decode(image_base64)
             image = Image.open(BytesIO(image_data))
             
             # Extract text using pytesseract
-            text = pytesseract.image_to_string(image)
+            # pytesseract blocks for the whole recognition; keep it off the event loop
+            with track_upstream("tesseract"):
+                text = await asyncio.to_thread(pytesseract.image_to_string, image)
             
             return {
                 "extracted_text": text,
@@ -56,6 +84,8 @@ class OCRService:
                 "language": "en"
             }
         except Exception as e:
+            if not allow_mock:
+                raise OCRError(f"Local OCR failed: {e}") from e
             # Mock fallback
             return {
                 "extracted_text": "Sample extracted text from image. This is a mock implementation.",
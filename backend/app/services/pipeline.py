@@ -0,0 +1,242 @@
+import asyncio
+import os
+import re
+from typing import Dict, Optional
+import aiofiles
+from app.core.config import settings
+from app.core.metrics import JOB_QUEUE_DEPTH
+from app.db.neo4j_driver import neo4j_driver
+from app.services.ai_service import AIService
+from app.services.job_queue import JobStore, LeaseLostError, TERMINAL_STATUSES
+from app.services.llm_limiter import BACKGROUND
+from app.services.ocr_service import OCRService
+
+# Stages of a scan job, in order
+STAGES = ["ocr", "concepts", "enhance", "graph"]
+
+
+class StageUnavailableError(Exception):
+    """A stage's backing service is down; retry no sooner than `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _concept_id(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+class ScanPipeline:
+    """Runs scan jobs (OCR -> concepts -> enhance -> graph) from the durable queue.
+
+    Each stage has its own pool of worker coroutines, so a slow OCR backlog does
+    not starve LLM or graph work. Failed stages are retried with exponential
+    backoff; running tasks are requeued on startup so jobs survive restarts.
+    """
+
+    def __init__(self, store: JobStore = None):
+        self.store = store or JobStore()
+        self.concurrency = {
+            "ocr": settings.job_ocr_concurrency,
+            "concepts": settings.job_concepts_concurrency,
+            "enhance": settings.job_enhance_concurrency,
+            "graph": settings.job_graph_concurrency,
+        }
+        self.max_attempts = {stage: settings.job_max_attempts for stage in STAGES}
+        # Outlast a Neo4j outage rather than dropping the graph insert
+        self.max_attempts["graph"] = max(settings.job_max_attempts, settings.job_graph_max_attempts)
+        self.handlers = {
+            "ocr": self._run_ocr,
+            "concepts": self._run_concepts,
+            "enhance": self._run_enhance,
+            "graph": self._run_graph,
+        }
+        self._wakeup: Dict[str, asyncio.Event] = {}
+        self._subscribers: Dict[str, set] = {}
+        self._tasks = []
+
+    async def start(self):
+        os.makedirs(settings.job_spool_dir, exist_ok=True)
+        for stage in STAGES:
+            self._wakeup[stage] = asyncio.Event()
+            for _ in range(self.concurrency[stage]):
+                self._tasks.append(asyncio.create_task(self._worker(stage)))
+        self._tasks.append(asyncio.create_task(self._report_queue_depths()))
+        self._tasks.append(asyncio.create_task(self._recover_expired()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit_scan(self, image: bytes, filename: Optional[str] = None) -> str:
+        """Spool the upload to disk and queue a scan job for it."""
+        spool_name = f"{os.urandom(16).hex()}.img"
+        spool_path = os.path.join(settings.job_spool_dir, spool_name)
+        async with aiofiles.open(spool_path, "wb") as f:
+            await f.write(image)
+        job_id = await asyncio.to_thread(
+            self.store.create_job, "scan", {"image_path": spool_path, "filename": filename}, STAGES[0]
+        )
+        self._notify_stage(STAGES[0])
+        return job_id
+
+    def subscribe(self, job_id: str) -> asyncio.Event:
+        """Event set whenever the job has new progress events."""
+        event = asyncio.Event()
+        self._subscribers.setdefault(job_id, set()).add(event)
+        return event
+
+    def unsubscribe(self, job_id: str, event: asyncio.Event):
+        listeners = self._subscribers.get(job_id)
+        if listeners:
+            listeners.discard(event)
+            if not listeners:
+                del self._subscribers[job_id]
+
+    def _publish(self, job_id: str):
+        for event in self._subscribers.get(job_id, ()):
+            event.set()
+
+    def _notify_stage(self, stage: str):
+        if stage in self._wakeup:
+            self._wakeup[stage].set()
+
+    async def _worker(self, stage: str):
+        wakeup = self._wakeup[stage]
+        while True:
+            try:
+                task = await asyncio.to_thread(self.store.claim, stage)
+            except Exception as e:
+                print(f"Job queue claim failed for {stage}: {e}")
+                task = None
+            if task is None:
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), settings.job_poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._publish(task["job_id"])
+            heartbeat = asyncio.create_task(self._renew_lease(task))
+            try:
+                await self._run_task(task)
+            except LeaseLostError as e:
+                # Another worker took the task over; its result is the one that counts
+                print(f"Job {task['job_id']} stage {stage} result discarded: {e}")
+            except Exception as e:
+                # Bookkeeping failed; the task stays "running" and is requeued once its lease expires
+                print(f"Job {task['job_id']} stage {stage} could not be recorded: {e}")
+            finally:
+                heartbeat.cancel()
+            self._publish(task["job_id"])
+
+    async def _renew_lease(self, task: Dict):
+        """Keep the task's lease alive while its handler runs."""
+        while True:
+            await asyncio.sleep(self.store.lease_seconds / 3)
+            try:
+                if not await asyncio.to_thread(self.store.renew, task):
+                    print(f"Job {task['job_id']} stage {task['stage']} lost its lease")
+                    return
+            except Exception as e:
+                print(f"Job {task['job_id']} lease renewal failed: {e}")
+
+    async def _run_task(self, task: Dict):
+        stage = task["stage"]
+        try:
+            output = await self.handlers[stage](task)
+        except Exception as e:
+            await self._handle_failure(task, e)
+            return
+        index = STAGES.index(stage)
+        next_stage = STAGES[index + 1] if index + 1 < len(STAGES) else None
+        await asyncio.to_thread(
+            self.store.complete_stage, task, output, next_stage, (index + 1) / len(STAGES)
+        )
+        if next_stage:
+            self._notify_stage(next_stage)
+        else:
+            await self._cleanup(task)
+
+    async def _handle_failure(self, task: Dict, error: Exception):
+        message = f"{type(error).__name__}: {error}"
+        if task["attempt"] < self.max_attempts[task["stage"]]:
+            delay = min(settings.job_retry_backoff * 2 ** (task["attempt"] - 1), settings.job_retry_max_delay)
+            # Respect the LLM admission controller's Retry-After hint
+            delay = max(delay, getattr(error, "retry_after", 0))
+            await asyncio.to_thread(self.store.retry, task, message, delay)
+        else:
+            await asyncio.to_thread(self.store.fail, task, message)
+            await self._cleanup(task)
+
+    async def _cleanup(self, task: Dict):
+        """Remove the spooled upload once the job has finished either way."""
+        image_path = task["payload"].get("image_path")
+        if image_path and os.path.exists(image_path):
+            await asyncio.to_thread(os.remove, image_path)
+
+    async def _report_queue_depths(self):
+        while True:
+            try:
+                depths = await asyncio.to_thread(self.store.queue_depths)
+                for stage in STAGES:
+                    JOB_QUEUE_DEPTH.labels(stage).set(depths.get(stage, 0))
+            except Exception as e:
+                print(f"Job queue depth check failed: {e}")
+            await asyncio.sleep(5)
+
+    async def _recover_expired(self):
+        """Requeue tasks whose worker stopped renewing the lease, in this process or another."""
+        while True:
+            try:
+                resumed = await asyncio.to_thread(self.store.recover)
+                if resumed:
+                    print(f"Resuming {resumed} interrupted job task(s)")
+                    for stage in STAGES:
+                        self._notify_stage(stage)
+            except Exception as e:
+                print(f"Job recovery check failed: {e}")
+            await asyncio.sleep(self.store.lease_seconds / 2)
+
+    # Stage handlers: each receives the claimed task and returns JSON-serializable output
+
+    async def _run_ocr(self, task: Dict) -> Dict:
+        async with aiofiles.open(task["payload"]["image_path"], "rb") as f:
+            image = await f.read()
+        # Placeholder text would be turned into concepts and merged into the shared graph
+        return await OCRService.extract_text_from_bytes(image, allow_mock=False)
+
+    async def _run_concepts(self, task: Dict) -> list:
+        return await AIService.extract_concepts(task["result"]["ocr"]["extracted_text"], priority=BACKGROUND)
+
+    async def _run_enhance(self, task: Dict) -> Dict:
+        concepts = [c["concept"] for c in task["result"]["concepts"]]
+        if not concepts:
+            return {}
+        return await AIService.get_enhancements(concepts, priority=BACKGROUND)
+
+    async def _run_graph(self, task: Dict) -> Dict:
+        if not neo4j_driver.is_ready:
+            # Wait at least until the driver's next reconnect attempt
+            raise StageUnavailableError("Neo4j not available", retry_after=settings.neo4j_retry_interval)
+        enhancements = task["result"]["enhance"]
+        created = []
+        for concept in task["result"]["concepts"]:
+            name = concept["concept"]
+            definition = enhancements.get(name, {}).get("definition") or concept.get("definition", "")
+            concept_id = _concept_id(name)
+            await asyncio.to_thread(neo4j_driver.merge_concept, concept_id, name, definition)
+            created.append(concept_id)
+        return {"status": "created", "concept_ids": created}
+
+
+def is_terminal(job: Dict) -> bool:
+    return job["status"] in TERMINAL_STATUSES
+
+
+# Shared instance; started from the app lifespan
+scan_pipeline = ScanPipeline()
@@ -48,6 +48,11 @@ class SpacedRepetitionScheduler:
         
         return due_concepts
     
+    @staticmethod
+    def quality_factor(quality: int) -> float:
+        """Mastery change for a review of the given quality (-0.6 to +0.4)."""
+        return (quality - 3) * 0.2
+    
     @staticmethod
     def schedule_next_review(
         review_count: int,
@@ -58,7 +63,7 @@ class SpacedRepetitionScheduler:
         new_review_count = review_count + 1
         
         # Adjust mastery based on quality (0=incorrect, 5=perfect)
-        quality_factor = (quality - 3) * 0.2  # -0.6 to +0.4
+        quality_factor = SpacedRepetitionScheduler.quality_factor(quality)
         new_mastery = max(0, min(5, mastery_level + quality_factor))
         
         next_review = SpacedRepetitionScheduler.calculate_next_review(
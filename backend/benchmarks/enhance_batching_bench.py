@@ -0,0 +1,96 @@
+"""Concept enhancement throughput: one LLM call per request vs the micro-batcher.
+
+The upstream is simulated: each call costs a fixed prompt overhead plus a
+per-concept cost, and the provider serves at most --upstream-concurrency calls
+at once (as rate limits do in practice).
+
+    cd backend
+    python benchmarks/enhance_batching_bench.py --users 200 --spread 2
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.enhancement_batcher import EnhancementBatcher
+
+
+def make_upstream(args):
+    semaphore = asyncio.Semaphore(args.upstream_concurrency)
+    calls = {"count": 0}
+
+    async def fetch(concepts, priority=0):
+        async with semaphore:
+            calls["count"] += 1
+            await asyncio.sleep(args.overhead_ms / 1000 + len(concepts) * args.per_concept_ms / 1000)
+            return {concept: {"definition": f"About {concept}"} for concept in concepts}
+
+    return fetch, calls
+
+
+def make_workload(args):
+    rng = random.Random(args.seed)
+    vocabulary = [f"concept-{i}" for i in range(args.vocabulary)]
+    return [
+        (rng.uniform(0, args.spread), rng.sample(vocabulary, rng.randint(1, 2)))
+        for _ in range(args.users)
+    ]
+
+
+async def run(workload, enhance):
+    latencies = []
+
+    async def user(delay, concepts):
+        await asyncio.sleep(delay)
+        start = time.perf_counter()
+        await enhance(concepts)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(delay, concepts) for delay, concepts in workload))
+    return time.perf_counter() - start, latencies
+
+
+async def main(args):
+    workload = make_workload(args)
+    total_concepts = sum(len(concepts) for _, concepts in workload)
+
+    fetch, calls = make_upstream(args)
+    unbatched = await run(workload, lambda concepts: fetch(concepts))
+    unbatched_calls = calls["count"]
+
+    fetch, calls = make_upstream(args)
+    batcher = EnhancementBatcher(fetch, priority=0, window=args.window_ms / 1000, max_batch=args.max_batch)
+    batched = await run(workload, batcher.enhance)
+    batched_calls = calls["count"]
+
+    print(f"{args.users} users, {total_concepts} concepts requested over {args.spread}s")
+    print(f"{'mode':<12}{'llm calls':>10}{'wall s':>10}{'concepts/s':>12}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, (wall, latencies), n_calls in (
+        ("unbatched", unbatched, unbatched_calls),
+        ("batched", batched, batched_calls),
+    ):
+        latencies.sort()
+        print(
+            f"{name:<12}{n_calls:>10}{wall:>10.2f}{total_concepts / wall:>12.1f}"
+            f"{statistics.median(latencies) * 1000:>10.0f}{latencies[int(len(latencies) * 0.95)] * 1000:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--spread", type=float, default=2.0, help="arrival window in seconds")
+    parser.add_argument("--vocabulary", type=int, default=300, help="distinct concepts")
+    parser.add_argument("--overhead-ms", type=float, default=800)
+    parser.add_argument("--per-concept-ms", type=float, default=60)
+    parser.add_argument("--upstream-concurrency", type=int, default=8)
+    parser.add_argument("--window-ms", type=float, default=50)
+    parser.add_argument("--max-batch", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,106 @@
+"""Payload size and encode/decode time for a knowledge-graph export.
+
+Compares, for a synthetic graph (default 10k concepts, 2 relationships each):
+- node-link JSON (a list of node objects and a list of {source, target, type}
+  link objects, the shape D3/Cytoscape clients build from the per-concept
+  /graph endpoint) encoded with json.dumps
+- the columnar snapshot from GraphSnapshotService as orjson and MessagePack
+- a delta after 1% of concepts change and 1% new relationships are added
+
+Decode time is the client-side parse (json.loads / msgpack.unpackb); rendering
+itself happens in the browser and is not measured here.
+
+    cd backend
+    python benchmarks/graph_snapshot_bench.py --nodes 10000
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import msgpack
+import orjson
+from app.services.graph_snapshot import GraphSnapshotService
+
+EDGE_TYPES = ["RELATED_TO", "PREREQUISITE_OF", "PART_OF"]
+
+
+def make_graph(nodes: int, edges_per_node: int, seed: int = 7):
+    rng = random.Random(seed)
+    concepts = [
+        {"id": f"concept_{i}", "name": f"Concept {i}", "definition": f"Definition of concept {i}."}
+        for i in range(nodes)
+    ]
+    relations = [
+        {"source": f"concept_{i}", "target": f"concept_{rng.randrange(nodes)}", "type": rng.choice(EDGE_TYPES)}
+        for i in range(nodes)
+        for _ in range(edges_per_node)
+    ]
+    return concepts, relations
+
+
+def node_link(concepts, relations) -> dict:
+    return {
+        "nodes": [{"id": c["id"], "name": c["name"]} for c in concepts],
+        "links": relations,
+    }
+
+
+def seconds_per_call(fn, min_time: float = 0.5) -> float:
+    fn()
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / calls
+
+
+def measure(label: str, content, encode, decode):
+    body = encode(content)
+    packed = gzip.compress(body, compresslevel=6)
+    encode_s = seconds_per_call(lambda: encode(content))
+    gzip_s = seconds_per_call(lambda: gzip.compress(body, compresslevel=6))
+    decode_s = seconds_per_call(lambda: decode(body))
+    print(f"{label:<26}{len(body) / 1024:>10.1f}{len(packed) / 1024:>10.1f}"
+          f"{encode_s * 1000:>11.2f}{gzip_s * 1000:>10.2f}{decode_s * 1000:>11.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=10_000)
+    parser.add_argument("--edges-per-node", type=int, default=2)
+    args = parser.parse_args()
+
+    concepts, relations = make_graph(args.nodes, args.edges_per_node)
+    snapshot = GraphSnapshotService.build(concepts, relations, "1-scope", None)
+
+    changed = concepts[::100]
+    added = relations[::100]
+    endpoints = {r["source"] for r in added} | {r["target"] for r in added}
+    delta_nodes = changed + [c for c in concepts if c["id"] in endpoints]
+    delta = GraphSnapshotService.build(delta_nodes, added, "2-scope", "1-scope")
+
+    json_dumps = lambda content: json.dumps(content, separators=(",", ":")).encode()
+    packb = lambda content: msgpack.packb(content, use_bin_type=True)
+
+    print(f"{args.nodes} concepts, {len(relations)} relationships (names only, no definitions)")
+    print(f"{'payload':<26}{'KiB':>10}{'gzip KiB':>10}{'encode ms':>11}{'gzip ms':>10}{'decode ms':>11}")
+    measure("node-link json", node_link(concepts, relations), json_dumps, json.loads)
+    measure("snapshot orjson", snapshot, orjson.dumps, orjson.loads)
+    measure("snapshot msgpack", snapshot, packb, msgpack.unpackb)
+    measure("delta (1%) orjson", delta, orjson.dumps, orjson.loads)
+
+    build_s = seconds_per_call(lambda: GraphSnapshotService.build(concepts, relations, "1-scope", None))
+    print(f"\nbuilding the columnar snapshot from query rows: {build_s * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""CPU time per response: default Pydantic/json path vs the fast path.
+
+Compares, at 10 / 1k / 10k rows:
+- /api/quiz/due: ORM objects + from_orm + response_model validation + json.dumps
+  vs column-only query + orjson streamed array
+- /api/quiz/generate: QuizResponse validation + json.dumps vs orjson of the dict
+
+    cd backend
+    python benchmarks/serialization_bench.py
+"""
+import json
+import os
+import sys
+import time
+import uuid
+import warnings
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.responses import iter_json_array
+from app.db.database import Base
+from app.models.quiz import LearningProgress, LearningProgressResponse, QuizResponse
+from app.models.user import User
+from app.routes.quiz import progress_row, query_due_progress
+from app.services.ai_service import AIService
+from app.services.spaced_repetition import SpacedRepetitionScheduler
+
+# The default path uses from_orm exactly as the routes did
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+SIZES = (10, 1_000, 10_000)
+USER_ID = "bench-user"
+
+
+def starlette_json(content) -> bytes:
+    """What JSONResponse.render does."""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def cpu_per_call(fn, min_time: float = 0.5) -> float:
+    """Average CPU seconds per call, repeating until min_time has been spent."""
+    fn()
+    calls = 0
+    start = time.process_time()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.process_time() - start
+        if elapsed >= min_time:
+            return elapsed / calls
+
+
+def make_session(rows: int):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[User.__table__, LearningProgress.__table__])
+    session = sessionmaker(bind=engine)()
+    session.add(User(id=USER_ID, username="bench", hashed_password="x"))
+    now = datetime.utcnow()
+    session.add_all([
+        LearningProgress(
+            id=str(uuid.uuid4()),
+            user_id=USER_ID,
+            concept_id=f"concept-{i}",
+            mastery_level=i % 5,
+            review_count=i % 7,
+            next_review=None if i % 10 == 0 else now - timedelta(hours=i)
+        )
+        for i in range(rows)
+    ])
+    session.commit()
+    return session
+
+
+def bench_due(rows: int):
+    session = make_session(rows)
+    adapter = TypeAdapter(list[LearningProgressResponse])
+
+    def default_path():
+        session.expunge_all()
+        concepts = session.query(LearningProgress).filter(LearningProgress.user_id == USER_ID).all()
+        due = SpacedRepetitionScheduler.get_due_concepts(concepts)
+        models = [LearningProgressResponse.from_orm(c) for c in due]
+        validated = adapter.validate_python(jsonable_encoder(models))
+        return starlette_json(adapter.dump_python(validated, mode="json"))
+
+    def fast_path():
+        return b"".join(iter_json_array(query_due_progress(session, USER_ID), encode=progress_row))
+
+    assert json.loads(default_path()) == json.loads(fast_path())
+    return cpu_per_call(default_path), cpu_per_call(fast_path)
+
+
+def bench_quiz(questions: int):
+    quiz = {
+        "id": str(uuid.uuid4()),
+        "user_id": USER_ID,
+        "concept_id": "photosynthesis",
+        "title": "Photosynthesis",
+        "questions": AIService._generate_mock_questions("photosynthesis", questions),
+        "score": None,
+        "completed": False
+    }
+
+    def default_path():
+        model = QuizResponse.model_validate(quiz)
+        validated = QuizResponse.model_validate(model.model_dump())
+        return starlette_json(jsonable_encoder(validated))
+
+    def fast_path():
+        return orjson.dumps(quiz)
+
+    return cpu_per_call(default_path), cpu_per_call(fast_path)
+
+
+def report(title: str, bench):
+    print(f"\n{title}")
+    print(f"{'rows':>8}{'default ms':>14}{'fast ms':>12}{'speedup':>10}")
+    for size in SIZES:
+        default, fast = bench(size)
+        print(f"{size:>8}{default * 1000:>14.3f}{fast * 1000:>12.3f}{default / fast:>9.1f}x")
+
+
+if __name__ == "__main__":
+    report("/api/quiz/due (progress rows)", bench_due)
+    report("/api/quiz/generate (questions per quiz)", bench_quiz)
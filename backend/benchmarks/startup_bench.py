@@ -0,0 +1,88 @@
+"""Cold-start benchmark: import time of app.main and time to first request.
+
+Each run is a fresh interpreter so nothing is cached in sys.modules.
+
+    cd backend
+    python benchmarks/startup_bench.py --runs 5 --importtime
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, time
+t0 = time.perf_counter()
+from app.main import app
+t_import = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    assert client.get("/health").status_code == 200
+    t_first = time.perf_counter()
+print(json.dumps({
+    "import_s": t_import - t0,
+    "first_request_s": t_first - t0,
+}))
+"""
+
+def run_once(env: dict) -> dict:
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process_s"] = time.perf_counter() - start
+    return result
+
+def top_imports(env: dict, limit: int) -> list:
+    """Slowest modules by cumulative import time (python -X importtime)."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.split("|")]
+        rows.append((int(cumulative_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:limit]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", action="store_true", help="show slowest imports")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep every file the app writes at startup out of the source tree
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{tmp}/bench.db",
+            JOBS_DB_PATH=os.path.join(tmp, "jobs.db"),
+            JOB_SPOOL_DIR=os.path.join(tmp, "job_spool"),
+            IMAGE_CACHE_DIR=os.path.join(tmp, "image_cache"),
+        )
+        results = [run_once(env) for _ in range(args.runs)]
+
+        print(f"{'metric':<20}{'median ms':>12}{'min ms':>12}")
+        for key in ("import_s", "first_request_s", "process_s"):
+            values = [r[key] * 1000 for r in results]
+            print(f"{key:<20}{statistics.median(values):>12.1f}{min(values):>12.1f}")
+
+        if args.importtime:
+            print(f"\n{'cumulative ms':>14}  module")
+            for cumulative_us, name in top_imports(env, args.top):
+                print(f"{cumulative_us / 1000:>14.1f}  {name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import asyncio
+import json
+import pytest
+from app.core.config import settings
+from app.services.ai_service import AIService
+from app.services.llm_limiter import BACKGROUND, INTERACTIVE
+
+
+@pytest.fixture
+def openai(monkeypatch):
+    """Stub the OpenAI call; tests set `reply` and inspect the recorded `calls`."""
+    stub = {"reply": None, "calls": []}
+
+    async def fake_chat_completion(prompt, priority=INTERACTIVE, completions=1):
+        stub["calls"].append({"prompt": prompt, "priority": priority, "completions": completions})
+        return json.dumps(stub["reply"])
+
+    monkeypatch.setattr(settings, "openai_api_key", "test-key")
+    monkeypatch.setattr(AIService, "_chat_completion", staticmethod(fake_chat_completion))
+    return stub
+
+
+def test_enhancements_charge_one_completion_per_concept(openai):
+    openai["reply"] = {
+        "Photosynthesis": {"definition": "Light to sugar"},
+        "Osmosis": {"definition": "Water through a membrane"},
+    }
+    result = asyncio.run(AIService.get_enhancements(["Photosynthesis", "Osmosis"]))
+    assert set(result) == {"Photosynthesis", "Osmosis"}
+    assert [c["completions"] for c in openai["calls"]] == [2]
+
+
+def test_quiz_generation_uses_openai(openai):
+    questions = [
+        {"question": "Q?", "options": ["a", "b", "c", "d"], "correct_answer": "a", "explanation": "e"}
+    ] * 3
+    openai["reply"] = questions
+    result = asyncio.run(AIService.generate_quiz_questions("photosynthesis", num_questions=3))
+    assert result == questions
+    assert openai["calls"][0]["completions"] == 3
+    assert openai["calls"][0]["priority"] == INTERACTIVE
+
+
+def test_concept_extraction_uses_openai(openai):
+    openai["reply"] = [
+        {"concept": f"c{i}", "definition": "d", "related_terms": []} for i in range(5)
+    ]
+    result = asyncio.run(AIService.extract_concepts("some text", max_concepts=3))
+    assert [c["concept"] for c in result] == ["c0", "c1", "c2"]
+    assert openai["calls"][0]["priority"] == BACKGROUND